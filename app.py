@@ -1,5 +1,8 @@
+import argparse
+import sys
+import uuid
 import streamlit as st
-from translator_backend import EnglishHindiTranslator, download_nltk_data_once, lemmatizer
+from translator_backend import EnglishHindiTranslator
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -8,61 +11,51 @@ st.set_page_config(
     layout="wide"
 )
 
-def init_nltk_and_lemmatizer():
-    print("Attempting NLTK data download (if needed)...")
-    download_success = download_nltk_data_once() 
-    
-    if not download_success:
-        # This warning will appear on the Streamlit page
-        st.warning(
-            "NLTK data download might have had issues. Please check the console output "
-            "where you ran `streamlit run`. Translation quality may be affected. "
-            "You might need to install 'punkt' and 'wordnet' manually if errors persist: "
-            "In Python, run `import nltk; nltk.download('punkt'); nltk.download('wordnet')`."
-        )
-    else:
-        print("NLTK setup appears complete from Streamlit's perspective.")
-    
-    return download_success
-
-NLTK_READY = init_nltk_and_lemmatizer()
 
+def parse_app_args():
+    """Server-level options, given after `--` on the command line: streamlit run app.py -- --suggest"""
+    parser = argparse.ArgumentParser(prog="streamlit run app.py --")
+    parser.add_argument("--suggest", action="store_true",
+                        help="Translate misspelled words through the nearest dictionary word (up to 2 edits away)")
+    args, _ = parser.parse_known_args(sys.argv[1:])
+    return args
 
 
 @st.cache_resource
 def get_translator():
     print("Initializing translator instance...")
-    if not NLTK_READY:
-        # This check is a bit redundant if the app stops below, but good for robustness
-        st.error("Cannot initialize translator: NLTK resources are not ready. Check console.")
-        return None # Or raise an exception
-    
-    translator_instance = EnglishHindiTranslator() # From translator_backend
-    print(f"Translator initialized. Base dict size: {translator_instance.initial_dict_size}, Current: {len(translator_instance.eng_to_hindi_dict)}")
+    # NLTK, WordNet and the inflection index load in a background thread, so the first page renders at once.
+    # Requests made before the warmup finishes still work; they just load what they need themselves.
+    # The translator is shared by every session, so typo correction is a server-wide setting, not a sidebar toggle;
+    # its index is built by the same background warmup.
+    translator_instance = EnglishHindiTranslator(lazy=True, collect_stats=True,
+                                                 suggestions=parse_app_args().suggest) # From translator_backend
+    translator_instance.warmup(background=True, download_missing=True)
+    print(f"Translator initialized in {translator_instance.timings['init']:.2f}s. "
+          f"Base dict size: {translator_instance.initial_dict_size}, Current: {translator_instance.dictionary_size()}")
     return translator_instance
 
 # Get the translator instance
-if NLTK_READY:
-    translator = get_translator()
-    if translator is None:
-        st.error("Failed to initialize the translator. The app cannot continue.")
-        st.stop() # Stop the app if translator couldn't be created
-else:
-    # This message is more prominent if NLTK_READY is false from the start
-    st.error(
-        "Core NLTK resources ('punkt', 'wordnet') could not be set up. "
-        "The translator cannot function. Please check the console output for errors "
-        "when starting Streamlit. You may need to manually install them."
+translator = get_translator()
+if translator is None:
+    st.error("Failed to initialize the translator. The app cannot continue.")
+    st.stop() # Stop the app if translator couldn't be created
+
+if translator.warmup_done.is_set() and not all(translator.nltk_data.values()):
+    # This warning will appear on the Streamlit page
+    st.warning(
+        "NLTK data download might have had issues. Please check the console output "
+        "where you ran `streamlit run`. Translation quality may be affected. "
+        "You might need to install 'punkt_tab' and 'wordnet' manually if errors persist: "
+        "In Python, run `import nltk; nltk.download('punkt_tab'); nltk.download('wordnet')`."
     )
-    st.stop() 
-
 
 
 st.title(" English to Hindi Translator 🇮🇳")
 
 
 if translator:
-    st.info(f"{translator.extended_dict_message} Current dictionary size: {len(translator.eng_to_hindi_dict)} words.")
+    st.info(f"{translator.extended_dict_message} Current dictionary size: {translator.dictionary_size()} words.")
     st.caption("Note: This is a basic rule-based translator. It may not handle complex sentences or idioms well.")
 col1, col2 = st.columns(2)
 
@@ -78,7 +71,10 @@ with col2:
     hindi_translation_display = st.empty() # Placeholder for dynamic translation update
 
 if translator and english_sentence:
-    hindi_translation = translator.translate(english_sentence)
+    # Only sentences changed since the last rerun are retranslated; the rest come from the sentence cache
+    if "translator_session_id" not in st.session_state:
+        st.session_state.translator_session_id = uuid.uuid4().hex
+    hindi_translation = translator.translate_document(english_sentence, session_id=st.session_state.translator_session_id)
     hindi_translation_display.markdown(f"<p style='font-size: 1.1em; font-family: \"Noto Sans Devanagari\", sans-serif;'>{hindi_translation}</p>", unsafe_allow_html=True)
 elif translator: 
     hindi_translation_display.markdown("<p style='font-size: 1.1em; color: grey; font-family: \"Noto Sans Devanagari\", sans-serif;'>Translation will appear here...</p>", unsafe_allow_html=True)
@@ -104,7 +100,7 @@ if translator:
                 if new_eng_word and new_hin_word:
                     translator.add_word(new_eng_word, new_hin_word)
                     st.success(f"Added '{new_eng_word.lower()}': '{new_hin_word}' to the current session's dictionary.")
-                    st.caption(f"New dictionary size: {len(translator.eng_to_hindi_dict)} words.")
+                    st.caption(f"New dictionary size: {translator.dictionary_size()} words.")
                     st.warning("This change is for the current session only. Click 'Save Dictionary' to make it persistent.")
                     st.experimental_rerun()
                 else:
@@ -112,7 +108,7 @@ if translator:
         
         # Save dictionary
         st.subheader("💾 Save Dictionary")
-        if st.button("Save Current Dictionary to 'english_hindi_dict.json'"):
+        if st.button("Save Added Words to 'english_hindi_dict.json.journal'"):
             success, message = translator.create_extended_dictionary() # Method from backend
             if success:
                 st.success(message)
@@ -121,30 +117,66 @@ if translator:
                 st.error(message)
             # Rerun to update the dictionary status message at the top
             st.experimental_rerun()
+        st.caption("Saving only appends your changes to a journal. Compacting folds the journal into the JSON file.")
+        if st.button("Compact 'english_hindi_dict.json' Now"):
+            success, message = translator.compact_dictionary() # Method from backend
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
 
 
 with st.expander("💡 How to use a larger dictionary?"):
     st.markdown("""
     To use a much larger dictionary for potentially better translations:
     1.  **Find a dictionary:**
-        *   [Indic Dict - English-Hindi](https://github.com/indic-dict/stardict-english-hindi) (might need conversion from StarDict format to JSON)
+        *   [Indic Dict - English-Hindi](https://github.com/indic-dict/stardict-english-hindi) (StarDict format; convert it with `python -m stardict_import path/to/dict.ifo --compact english_hindi_dict.ehd`, which loads instantly)
     2.  **Prepare the JSON file:**
         *   Ensure it's a flat JSON object where keys are English words (lowercase recommended) and values are their Hindi translations.
         *   Example: `{"apple": "सेब", "banana": "केला", ...}`
     3.  **Save it:** Name the file `english_hindi_dict.json` and place it in the **same directory** as this Streamlit app (`app.py` or `main2.py`) and `translator_backend.py`.
     4.  **Relaunch the app:** The app will automatically try to load it on startup. The message at the top of the page will indicate if it was loaded.
+    5.  **Very large dictionaries:** Convert the JSON file once with `python -m compact_dict english_hindi_dict.json` to get a memory-mapped `english_hindi_dict.ehd`, which loads instantly.
 
     """)
 
 
 st.sidebar.header("App Information")
-if NLTK_READY:
+if not translator.warmup_done.is_set():
+    st.sidebar.info("NLTK Resources: Loading in the background ⏳")
+elif all(translator.nltk_data.values()):
     st.sidebar.success("NLTK Resources: Ready ✅")
 else:
     st.sidebar.error("NLTK Resources: Setup Issue ❌")
+timings = translator.timings
+st.sidebar.caption("Startup: " + ", ".join(f"{stage.replace('_', ' ')} {seconds:.2f}s" for stage, seconds in timings.items()))
 
 if translator:
-    st.sidebar.info(f"Current Dictionary Size: {len(translator.eng_to_hindi_dict)}")
+    st.sidebar.info(f"Current Dictionary Size: {translator.dictionary_size()}")
+    if not translator.suggestions:
+        st.sidebar.caption("Typo correction: off (start the app with `-- --suggest` to turn it on)")
+    elif translator.suggestion_index_report() is None:
+        st.sidebar.caption("Typo correction: building the index in the background ⏳")
+    else:
+        st.sidebar.caption("Typo correction: on ✅")
+    stats = translator.stats()
+    if stats:
+        st.sidebar.subheader("Translation Statistics")
+        lemma_hits = ", ".join(f"{pos}: {count}" for pos, count in stats["lemma_hits"].items())
+        st.sidebar.markdown(
+            f"- Sentences: {stats['sentences']}, tokens: {stats['tokens']}\n"
+            f"- Tokenization: {stats['tokenize_seconds'] * 1000:.1f} ms, lookup: {stats['lookup_seconds'] * 1000:.1f} ms\n"
+            f"- Dictionary hits: {stats['direct_hits']}, phrases: {stats['phrase_hits']}, "
+            f"inflected forms: {stats['inflection_hits']}, corrected typos: {stats['suggestion_hits']}\n"
+            f"- Lemma fallback hits ({lemma_hits})\n"
+            f"- Not found: {stats['oov']}"
+        )
+        if stats["top_oov"]:
+            st.sidebar.caption("Most frequent missing words: "
+                               + ", ".join(f"{word} ({count})" for word, count in stats["top_oov"]))
+        if st.sidebar.button("Reset Statistics"):
+            translator.reset_stats()
+            st.experimental_rerun()
 else:
     st.sidebar.warning("Dictionary: Not loaded")
 
@@ -0,0 +1,318 @@
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from latency_stats import percentile
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+# Benchmark grid used when no --sizes/--oov-rates/--punct-densities are given
+DEFAULT_SIZES = (200, 10000, 100000, 1000000)
+DEFAULT_OOV_RATES = (0.05, 0.2)
+DEFAULT_PUNCT_DENSITIES = (0.1,)
+DEFAULT_SENTENCES = 2000
+DEFAULT_SENTENCE_LENGTH = 15
+# Smaller grid used by --quick for whichever of --sizes/--sentences is not given
+QUICK_SIZES = (200, 10000)
+QUICK_SENTENCES = 300
+# Words added before timing create_extended_dictionary() (journal append) and compact_dictionary()
+DEFAULT_EDITS = 200
+# Allowed relative change before a metric counts as a regression against the baseline
+DEFAULT_THRESHOLD = 0.15
+
+# metric -> (True if higher is better, smallest absolute change that can count as a regression)
+# The floors keep timer noise on very fast operations from being reported as large relative changes.
+METRICS = {
+    "tokens_per_sec": (True, 0.0),
+    "p50_ms": (False, 0.05),
+    "p99_ms": (False, 0.1),
+    "load_seconds": (False, 0.01),
+    "save_seconds": (False, 0.01),
+    "compact_seconds": (False, 0.01),
+    "peak_rss_mb": (False, 2.0),
+}
+
+# Dictionary words are built from these syllables; OOV words always contain an "x" syllable, so they never collide
+_SYLLABLES = ("ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu pa pe pi po pu "
+              "ra re ri ro ru sa se si so su ta te ti to tu va ve vi vo vu ba be bi bo bu").split()
+_OOV_SYLLABLES = ("xa", "xe", "xi", "xo", "xu")
+_DEVANAGARI = [chr(code) for code in range(0x0915, 0x0939)]
+_PUNCTUATION = (",", ";", ":", "!", "?", "\"", "'", "(", ")")
+_SENTENCE_ENDS = (".", ".", ".", "?", "!")
+
+
+def synthetic_word(index):
+    """Deterministic, unique pseudo-English word for `index` (at least two syllables)"""
+    n = index + len(_SYLLABLES) + 1 # Skip the one-syllable words
+    syllables = []
+    while n:
+        n, digit = divmod(n - 1, len(_SYLLABLES))
+        syllables.append(_SYLLABLES[digit])
+    return "".join(syllables)
+
+
+def generate_dictionary(size, seed=0):
+    """Synthetic English -> Hindi dictionary of `size` unique single-word entries"""
+    rng = random.Random(seed)
+    return {synthetic_word(index): "".join(rng.choice(_DEVANAGARI) for _ in range(rng.randint(2, 5)))
+            for index in range(size)}
+
+
+def generate_corpus(words, sentences, oov_rate, punct_density, sentence_length=DEFAULT_SENTENCE_LENGTH, seed=0):
+    """Synthetic sentences drawn from `words` with the given share of OOV tokens and attached punctuation.
+    Known words follow a skewed (log-uniform) frequency distribution, like real text."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(sentences):
+        tokens = []
+        for _ in range(rng.randint(sentence_length // 2, sentence_length * 3 // 2)):
+            if rng.random() < oov_rate:
+                word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 3))) + rng.choice(_OOV_SYLLABLES)
+            else:
+                word = words[int(len(words) ** rng.random()) - 1]
+            if rng.random() < punct_density:
+                mark = rng.choice(_PUNCTUATION)
+                word = f"{mark}{word}" if mark in "\"'(" else f"{word}{mark}"
+            tokens.append(word)
+        tokens[0] = tokens[0].capitalize()
+        corpus.append(" ".join(tokens) + rng.choice(_SENTENCE_ENDS))
+    return corpus
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it cannot be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KB elsewhere
+
+
+class _IdentityLemmatizer:
+    """Stands in for WordNet when benchmarking without NLTK data: every word is its own lemma"""
+
+    def lemmatize(self, word, pos="n"):
+        return word
+
+
+def write_inputs(work_dir, scenario):
+    """Generate the scenario's dictionary and corpus files in `work_dir` (in the parent, so the generation
+    does not count towards the scenario's peak RSS); the dictionary file is reused by scenarios of the same size"""
+    dict_file = os.path.join(work_dir, f"dict-{scenario['dict_size']}-{scenario['seed']}.json")
+    if not os.path.exists(dict_file):
+        dictionary = generate_dictionary(scenario["dict_size"], seed=scenario["seed"])
+        with open(dict_file, "w", encoding="utf-8") as f:
+            json.dump(dictionary, f, ensure_ascii=False)
+    else:
+        dictionary = [synthetic_word(index) for index in range(scenario["dict_size"])]
+    corpus_file = os.path.join(work_dir, "corpus.txt")
+    corpus = generate_corpus(list(dictionary), scenario["sentences"], scenario["oov_rate"],
+                             scenario["punct_density"], scenario["sentence_length"], seed=scenario["seed"] + 1)
+    with open(corpus_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(corpus) + "\n")
+    return dict_file, corpus_file
+
+
+def run_scenario(scenario, dict_file, corpus_file):
+    """Run one benchmark scenario in this process and return its metrics"""
+    import translator_backend
+    if not scenario["wordnet"]:
+        translator_backend.lemmatizer = _IdentityLemmatizer()
+
+    with open(corpus_file, "r", encoding="utf-8") as f:
+        corpus = f.read().splitlines()
+    result = dict(scenario)
+    with tempfile.TemporaryDirectory(prefix="translator-bench-") as run_dir:
+        # The translator loads english_hindi_dict.json from the working directory, and saving changes it
+        shutil.copyfile(dict_file, os.path.join(run_dir, "english_hindi_dict.json"))
+        previous_dir = os.getcwd()
+        os.chdir(run_dir)
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                # Without WordNet the inflection index cannot be built, so it is left out (lazy=True)
+                translator = translator_backend.EnglishHindiTranslator(
+                    fast_tokenizer=True, compact_dict_file=None, lazy=not scenario["wordnet"])
+                result["load_seconds"] = time.perf_counter() - start
+
+                latencies = []
+                tokens = 0
+                for sentence in corpus:
+                    start = time.perf_counter()
+                    translator.translate(sentence)
+                    latencies.append(time.perf_counter() - start)
+                for sentence in corpus:
+                    tokens += len(translator_backend.fast_tokenize(sentence.lower()))
+
+                for i in range(scenario["edits"]):
+                    translator.add_word(f"{synthetic_word(i)}{_OOV_SYLLABLES[0]}", "नया")
+                start = time.perf_counter()
+                translator.create_extended_dictionary()
+                result["save_seconds"] = time.perf_counter() - start
+                start = time.perf_counter()
+                translator.compact_dictionary()
+                result["compact_seconds"] = time.perf_counter() - start
+        finally:
+            os.chdir(previous_dir)
+
+    total = sum(latencies)
+    latencies.sort()
+    result["tokens"] = tokens
+    result["tokens_per_sec"] = tokens / total if total > 0 else 0.0
+    result["p50_ms"] = percentile(latencies, 0.50) * 1000
+    result["p99_ms"] = percentile(latencies, 0.99) * 1000
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+# Scenario settings that change the measured workload; results are only compared when all of them match
+SCENARIO_FIELDS = ("dict_size", "oov_rate", "punct_density", "sentences", "sentence_length", "edits", "seed",
+                   "wordnet")
+
+
+def scenario_key(result):
+    """Identifies a scenario across runs, for comparing against a baseline (None for settings a result lacks)"""
+    return tuple(result.get(field) for field in SCENARIO_FIELDS)
+
+
+def run_benchmarks(scenarios):
+    """Run every scenario in its own fresh process (so peak RSS is per scenario) and yield the results"""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="translator-bench-inputs-") as work_dir:
+        for scenario in scenarios:
+            inputs = write_inputs(work_dir, scenario)
+            with context.Pool(1) as pool:
+                yield pool.apply(run_scenario, (scenario, *inputs))
+
+
+def compare(results, baseline, thresholds):
+    """Compare `results` with `baseline` results; returns a list of regression messages"""
+    baseline_by_key = {scenario_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get(scenario_key(result))
+        if base is None:
+            continue
+        for metric, (higher_is_better, noise_floor) in METRICS.items():
+            new, old = result.get(metric), base.get(metric)
+            if new is None or not old or abs(new - old) <= noise_floor:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > thresholds.get(metric, thresholds["default"]):
+                regressions.append(f"size={result['dict_size']} oov={result['oov_rate']} "
+                                   f"punct={result['punct_density']}: {metric} {old:.4g} -> {new:.4g} "
+                                   f"({change:+.1%})")
+    return regressions
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(",") if value]
+
+
+def _thresholds(values, default):
+    """Parse METRIC=FRACTION overrides into a thresholds dict"""
+    thresholds = {"default": default}
+    for value in values:
+        metric, sep, fraction = value.partition("=")
+        if not sep or metric not in METRICS:
+            raise argparse.ArgumentTypeError(f"Expected METRIC=FRACTION with METRIC one of {', '.join(METRICS)}: "
+                                             f"'{value}'")
+        thresholds[metric] = float(fraction)
+    return thresholds
+
+
+def main(argv=None):
+    """Command line entry point: run the benchmark grid, write JSON results and check them against a baseline"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark",
+        description="Benchmark the translator on synthetic dictionaries and corpora. Runs offline: "
+                    "it uses the fast tokenizer and stubs out WordNet unless --wordnet is given.")
+    parser.add_argument("--sizes", help="Comma-separated dictionary sizes (default: "
+                                        + ",".join(map(str, DEFAULT_SIZES)) + ")")
+    parser.add_argument("--oov-rates", default=",".join(map(str, DEFAULT_OOV_RATES)),
+                        help="Comma-separated shares of out-of-vocabulary tokens (default: %(default)s)")
+    parser.add_argument("--punct-densities", default=",".join(map(str, DEFAULT_PUNCT_DENSITIES)),
+                        help="Comma-separated shares of tokens with attached punctuation (default: %(default)s)")
+    parser.add_argument("--sentences", type=int, help=f"Sentences per scenario (default: {DEFAULT_SENTENCES})")
+    parser.add_argument("--sentence-length", type=int, default=DEFAULT_SENTENCE_LENGTH,
+                        help="Average tokens per sentence")
+    parser.add_argument("--edits", type=int, default=DEFAULT_EDITS, help="Words added before timing the save")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic data")
+    parser.add_argument("--wordnet", action="store_true",
+                        help="Use the real WordNet data (must be installed) and build the inflection index")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"Small smoke run: sizes {','.join(map(str, QUICK_SIZES))} and {QUICK_SENTENCES} "
+                             "sentences, unless --sizes/--sentences are given")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression for every metric (default: %(default)s)")
+    parser.add_argument("--metric-threshold", action="append", default=[], metavar="METRIC=FRACTION",
+                        help="Per-metric override, e.g. p99_ms=0.5 (repeatable)")
+    args = parser.parse_args(argv)
+    try:
+        thresholds = _thresholds(args.metric_threshold, args.threshold)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.sizes is None:
+        args.sizes = ",".join(map(str, QUICK_SIZES if args.quick else DEFAULT_SIZES))
+    if args.sentences is None:
+        args.sentences = QUICK_SENTENCES if args.quick else DEFAULT_SENTENCES
+
+    scenarios = [
+        {"dict_size": int(size), "oov_rate": oov_rate, "punct_density": punct_density,
+         "sentences": args.sentences, "sentence_length": args.sentence_length, "edits": args.edits,
+         "seed": args.seed, "wordnet": args.wordnet}
+        for size, oov_rate, punct_density in itertools.product(
+            _float_list(args.sizes), _float_list(args.oov_rates), _float_list(args.punct_densities))]
+
+    results = []
+    print(f"{'size':>8} {'oov':>5} {'punct':>5} {'tokens/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'load s':>7} {'save s':>7} {'compact s':>9} {'RSS MB':>7}")
+    for result in run_benchmarks(scenarios):
+        results.append(result)
+        rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+        print(f"{result['dict_size']:>8} {result['oov_rate']:>5} {result['punct_density']:>5} "
+              f"{result['tokens_per_sec']:>10.0f} {result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} "
+              f"{result['load_seconds']:>7.2f} {result['save_seconds']:>7.3f} {result['compact_seconds']:>9.2f} "
+              f"{rss:>7}", flush=True)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                              "cpus": os.cpu_count()},
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        baseline_keys = {scenario_key(result) for result in baseline}
+        unmatched = sum(1 for result in results if scenario_key(result) not in baseline_keys)
+        if unmatched:
+            print(f"{unmatched} of {len(results)} results have no baseline run with the same settings "
+                  f"({', '.join(SCENARIO_FIELDS)}) and are not compared.")
+        regressions = compare(results, baseline, thresholds)
+        if regressions:
+            print(f"{len(regressions)} regressions against '{args.baseline}':")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against '{args.baseline}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
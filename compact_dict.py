@@ -0,0 +1,291 @@
+import argparse
+import array
+import bisect
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+
+# On-disk layout (all integers little-endian uint32):
+#   magic (8 bytes) | entries table offset | inflections table offset (0 if absent)
+# Each table:
+#   count | (count + 1) key offsets | (count + 1) value offsets | key blob size | key blob | value blob
+# Keys are UTF-8 and sorted bytewise (the same order as sorting Python str), so lookups are a binary search.
+MAGIC = b"EHDICT\x00\x01"
+_HEADER = struct.Struct("<8sII")
+_U32 = struct.Struct("<I")
+_PAIR = struct.Struct("<II")
+_MAX_OFFSET = 0xFFFFFFFF
+
+DEFAULT_COMPACT_DICT_FILE = "english_hindi_dict.ehd"
+
+
+class _CompactTable:
+    """Read-only view of one sorted key/value table inside a mapped file"""
+
+    def __init__(self, mm, offset):
+        self._mm = mm
+        self.count = _U32.unpack_from(mm, offset)[0]
+        self._key_offsets = offset + 4
+        self._value_offsets = self._key_offsets + 4 * (self.count + 1)
+        key_blob_size_pos = self._value_offsets + 4 * (self.count + 1)
+        key_blob_size = _U32.unpack_from(mm, key_blob_size_pos)[0]
+        self._key_blob = key_blob_size_pos + 4
+        self._value_blob = self._key_blob + key_blob_size
+
+    def key_at(self, i):
+        start, end = _PAIR.unpack_from(self._mm, self._key_offsets + 4 * i)
+        return self._mm[self._key_blob + start:self._key_blob + end]
+
+    def value_at(self, i):
+        start, end = _PAIR.unpack_from(self._mm, self._value_offsets + 4 * i)
+        return self._mm[self._value_blob + start:self._value_blob + end].decode("utf-8")
+
+    def find(self, key_bytes):
+        """Return the index of `key_bytes`, or -1 if it is not in the table"""
+        mm = self._mm
+        key_offsets = self._key_offsets
+        key_blob = self._key_blob
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = _PAIR.unpack_from(mm, key_offsets + 4 * mid)
+            probe = mm[key_blob + start:key_blob + end]
+            if probe < key_bytes:
+                lo = mid + 1
+            elif probe > key_bytes:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def get(self, key, default=None):
+        i = self.find(key.encode("utf-8"))
+        return self.value_at(i) if i >= 0 else default
+
+    def keys_containing(self, needle):
+        """Yield the keys that contain `needle` (bytes), scanning the key blob at C speed"""
+        key_ends = array.array("I")
+        key_ends.frombytes(self._mm[self._key_offsets + 4:self._value_offsets])
+        if sys.byteorder == "big":
+            key_ends.byteswap()
+        position = self._key_blob
+        blob_end = self._key_blob + (key_ends[-1] if self.count else 0)
+        while True:
+            hit = self._mm.find(needle, position, blob_end)
+            if hit < 0:
+                return
+            i = bisect.bisect_right(key_ends, hit - self._key_blob) # Index of the key holding the hit
+            yield self.key_at(i).decode("utf-8")
+            position = self._key_blob + key_ends[i]
+
+
+class CompactDictionary(Mapping):
+    """Memory-mapped English -> Hindi dictionary written by CompactDictionaryWriter.
+
+    Opening is near-instant whatever the size, and the mapped pages are shared between
+    every process that opens the same file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, entries_offset, inflections_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"'{path}' is not a compact dictionary file")
+        self._entries = _CompactTable(self._mm, entries_offset)
+        self._inflections = _CompactTable(self._mm, inflections_offset) if inflections_offset else None
+
+    @property
+    def has_inflections(self):
+        """True if the file carries a precomputed inflected form -> Hindi table"""
+        return self._inflections is not None
+
+    def get(self, key, default=None):
+        return self._entries.get(key, default)
+
+    def phrase_keys(self):
+        """Yield the multi-word entries (keys containing a space)"""
+        return self._entries.keys_containing(b" ")
+
+    def get_inflection(self, form, default=None):
+        """Look up an inflected form (e.g. 'went', 'books') in the precomputed inflection table"""
+        if self._inflections is None:
+            return default
+        return self._inflections.get(form, default)
+
+    def __getitem__(self, key):
+        i = self._entries.find(key.encode("utf-8"))
+        if i < 0:
+            raise KeyError(key)
+        return self._entries.value_at(i)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._entries.find(key.encode("utf-8")) >= 0
+
+    def __len__(self):
+        return self._entries.count
+
+    def __iter__(self):
+        for i in range(self._entries.count):
+            yield self._entries.key_at(i).decode("utf-8")
+
+    def close(self):
+        self._mm.close()
+
+
+class _TableWriter:
+    """Spools one table's keys and values to temporary files while recording offsets"""
+
+    def __init__(self, name):
+        self.name = name
+        self.keys = tempfile.TemporaryFile()
+        self.values = tempfile.TemporaryFile()
+        self.key_offsets = array.array("I", [0])
+        self.value_offsets = array.array("I", [0])
+        self.last_key = None
+
+    def add(self, key, value):
+        key_bytes = key.encode("utf-8")
+        if self.last_key is not None and key_bytes <= self.last_key:
+            raise ValueError(f"{self.name} must be added in sorted order without duplicates: "
+                             f"'{key}' after '{self.last_key.decode('utf-8')}'")
+        self.last_key = key_bytes
+        self.keys.write(key_bytes)
+        self.values.write(value.encode("utf-8"))
+        key_end, value_end = self.keys.tell(), self.values.tell()
+        if key_end > _MAX_OFFSET or value_end > _MAX_OFFSET:
+            raise ValueError(f"{self.name} exceed the 4 GB limit of the compact format")
+        self.key_offsets.append(key_end)
+        self.value_offsets.append(value_end)
+
+    def __len__(self):
+        return len(self.key_offsets) - 1
+
+    def write_to(self, out):
+        out.write(_U32.pack(len(self)))
+        for offsets in (self.key_offsets, self.value_offsets):
+            if sys.byteorder == "big":
+                offsets = array.array("I", offsets)
+                offsets.byteswap()
+            out.write(offsets.tobytes())
+        out.write(_U32.pack(self.key_offsets[-1]))
+        for blob in (self.keys, self.values):
+            blob.seek(0)
+            shutil.copyfileobj(blob, out)
+
+    def close(self):
+        self.keys.close()
+        self.values.close()
+
+
+class CompactDictionaryWriter:
+    """Streams sorted entries (and optionally sorted inflected forms) into a compact dictionary file.
+
+    Entries and inflections are each kept in sorted key order; only their offsets are held in memory.
+    The file is written to a temporary name and renamed into place on close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = _TableWriter("Entries")
+        self._inflections = _TableWriter("Inflections")
+
+    def add(self, key, value):
+        self._entries.add(key, value)
+
+    def add_inflection(self, form, value):
+        self._inflections.add(form, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as out:
+                out.write(_HEADER.pack(MAGIC, 0, 0))
+                entries_offset = out.tell()
+                self._entries.write_to(out)
+                inflections_offset = 0
+                if len(self._inflections):
+                    inflections_offset = out.tell()
+                    self._inflections.write_to(out)
+                if out.tell() > _MAX_OFFSET:
+                    raise ValueError("Dictionary exceeds the 4 GB limit of the compact format")
+                out.seek(0)
+                out.write(_HEADER.pack(MAGIC, entries_offset, inflections_offset))
+            os.replace(tmp_path, self.path)
+        finally:
+            self._entries.close()
+            self._inflections.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def discard(self):
+        """Abandon the file without writing it"""
+        self._entries.close()
+        self._inflections.close()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def write_compact_dictionary(path, entries, inflections=None):
+    """Write `entries` (and optional `inflections`), both mappings of str -> str, to a compact file"""
+    with CompactDictionaryWriter(path) as writer:
+        for key in sorted(entries):
+            writer.add(key, entries[key])
+        for form in sorted(inflections or ()):
+            writer.add_inflection(form, inflections[form])
+    return len(entries)
+
+
+def compute_inflections(entries):
+    """Map every inflected form reachable from `entries` to its Hindi entry (needs WordNet data)"""
+    from translator_backend import EnglishHindiTranslator
+    translator = EnglishHindiTranslator(cache_size=0, dictionary=entries, compact_dict_file=None)
+    if not translator.inflection_index_ready:
+        return None
+    return translator.dictionary_snapshot().inflection_index
+
+
+def main(argv=None):
+    """Command line entry point: convert a JSON dictionary into the compact format"""
+    parser = argparse.ArgumentParser(
+        prog="python -m compact_dict",
+        description="Convert an English -> Hindi JSON dictionary into the memory-mapped compact format.")
+    parser.add_argument("json_file", help="Flat JSON object of English words to Hindi translations")
+    parser.add_argument("output", nargs="?", default=DEFAULT_COMPACT_DICT_FILE,
+                        help=f"Output file (default: {DEFAULT_COMPACT_DICT_FILE})")
+    parser.add_argument("--no-inflections", action="store_true",
+                        help="Skip the precomputed inflection table (no WordNet needed)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with open(args.json_file, "r", encoding="utf-8") as f:
+        entries = {key.lower(): value for key, value in json.load(f).items()}
+    inflections = None
+    if not args.no_inflections:
+        inflections = compute_inflections(entries)
+        if inflections is None:
+            print("WordNet data not available; writing the dictionary without an inflection table.")
+    write_compact_dictionary(args.output, entries, inflections)
+    print(f"Wrote {len(entries)} entries and {len(inflections or ())} inflected forms to '{args.output}' "
+          f"in {time.perf_counter() - start:.2f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import argparse
+import array
+import bisect
+import json
+import random
+import sys
+import time
+
+# Largest edit distance a suggestion may be from the misspelled word
+DEFAULT_MAX_DISTANCE = 2
+# Only the first characters of a word are expanded into deletes (as in SymSpell); this bounds the index
+# to at most 29 entries per word at distance 2, and candidates are verified on the full words anyway
+DEFAULT_PREFIX_LENGTH = 7
+# Words shorter than this get no suggestions, and words shorter than SHORT_WORD_LENGTH only at distance 1:
+# for very short words almost every headword is a couple of edits away
+MIN_WORD_LENGTH = 4
+SHORT_WORD_LENGTH = 6
+
+_MASK = 0xFFFFFFFF
+_BUCKETS = 256
+
+
+def deletes(word, max_distance):
+    """`word` plus every distinct string obtained by deleting up to `max_distance` characters from it"""
+    result = {word}
+    frontier = result
+    for _ in range(max_distance):
+        frontier = {text[:i] + text[i + 1:] for text in frontier if len(text) > 1 for i in range(len(text))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance between `a` and `b` (Levenshtein plus adjacent transpositions).
+    Stops early and returns max_distance + 1 once the distance is known to exceed `max_distance`."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # A common prefix and suffix do not change the distance; typos are local, so usually little is left
+    shortest = min(len(a), len(b))
+    prefix = 0
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        char_a = a[i - 1]
+        for j in range(1, len(b) + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1] and before_previous[j - 2] + 1 < value:
+                value = before_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class DeletionIndex:
+    """SymSpell-style symmetric delete index for finding the headword nearest to a misspelled word.
+
+    Every headword is expanded into the strings reachable by deleting up to `max_distance` characters
+    from its prefix. Each (delete hash, word id) pair is packed into one sorted 64-bit integer table,
+    so a lookup is a few binary searches plus an edit-distance check of the candidates, never a scan
+    over the dictionary. Words added later go into a small side table (see with_words())."""
+
+    def __init__(self, words, max_distance=DEFAULT_MAX_DISTANCE, prefix_length=DEFAULT_PREFIX_LENGTH):
+        start = time.perf_counter()
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = [] # word id -> headword
+        self._extra = {} # delete -> headwords added after the build
+        # Spread the packed entries over buckets by the top hash byte so they can be sorted in small pieces
+        buckets = [array.array("Q") for _ in range(_BUCKETS)]
+        for word in words:
+            if len(word) < MIN_WORD_LENGTH or not word.isalpha():
+                continue
+            word_id = len(self.words)
+            self.words.append(word)
+            for text in deletes(word[:prefix_length], max_distance):
+                key = hash(text) & _MASK
+                buckets[key >> 24].append(key << 32 | word_id)
+        self._table = array.array("Q")
+        for bucket in buckets:
+            self._table.extend(sorted(bucket))
+        self.build_seconds = time.perf_counter() - start
+
+    def with_words(self, words):
+        """Return a copy of this index that also covers `words`; the large sorted table is shared, not copied"""
+        index = object.__new__(DeletionIndex)
+        index.__dict__.update(self.__dict__)
+        index._extra = dict(self._extra)
+        for word in words:
+            if len(word) < MIN_WORD_LENGTH or not word.isalpha():
+                continue
+            for text in deletes(word[:self.prefix_length], self.max_distance):
+                index._extra[text] = index._extra.get(text, ()) + (word,)
+        return index
+
+    def _candidates(self, texts):
+        """Headwords that have one of the delete strings `texts` among their own deletes"""
+        table = self._table
+        size = len(table)
+        words = self.words
+        candidates = set()
+        for text in texts:
+            key = hash(text) & _MASK
+            end = (key + 1) << 32
+            i = bisect.bisect_left(table, key << 32)
+            while i < size and table[i] < end:
+                candidates.add(words[table[i] & _MASK])
+                i += 1
+            candidates.update(self._extra.get(text, ()))
+        return candidates
+
+    def suggest(self, word, max_distance=None):
+        """Return the headword nearest to `word` within the allowed edit distance, or None.
+        Ties are broken by the smaller length difference, then alphabetically, so results are deterministic."""
+        if len(word) < MIN_WORD_LENGTH or not word.isalpha():
+            return None
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if len(word) < SHORT_WORD_LENGTH:
+            limit = min(limit, 1)
+        best = None
+        best_rank = None
+        seen = set()
+        level = {word[:self.prefix_length]}
+        # Query deletes are tried one deletion at a time. A headword `d` edits away shares a delete with the
+        # query that takes at most `d` deletions from it, so once the best match is within the deletions
+        # tried so far nothing closer is left and the larger levels are skipped.
+        for deleted in range(limit + 1):
+            for candidate in self._candidates(level) - seen:
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance > limit:
+                    continue
+                rank = (distance, abs(len(candidate) - len(word)), candidate)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = candidate, rank
+                    limit = distance # Nothing further away can win any more
+            if best is not None and best_rank[0] <= deleted:
+                break
+            level = {text[:i] + text[i + 1:] for text in level if len(text) > 1 for i in range(len(text))}
+        return best
+
+    def memory_report(self):
+        """Approximate memory used by the index, in bytes, with the entry counts"""
+        table_bytes = self._table.buffer_info()[1] * self._table.itemsize
+        words_bytes = sys.getsizeof(self.words) + sum(sys.getsizeof(word) for word in self.words)
+        extra_bytes = sys.getsizeof(self._extra) + sum(sys.getsizeof(text) + sys.getsizeof(words)
+                                                       for text, words in self._extra.items())
+        return {"words": len(self.words), "entries": len(self._table), "extra_entries": len(self._extra),
+                "table_bytes": table_bytes, "words_bytes": words_bytes, "extra_bytes": extra_bytes,
+                "total_bytes": table_bytes + words_bytes + extra_bytes, "build_seconds": self.build_seconds}
+
+
+def _misspell(word, rng):
+    """Apply one random typo (deletion, insertion, substitution or transposition) to `word`"""
+    i = rng.randrange(len(word))
+    kind = rng.randrange(4)
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + letter + word[i:]
+    if kind == 2:
+        return word[:i] + letter + word[i + 1:]
+    if i + 1 < len(word):
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word + letter
+
+
+def main(argv=None):
+    """Command line entry point: build the index for a JSON dictionary and report its memory use and lookup speed"""
+    parser = argparse.ArgumentParser(
+        prog="python -m fuzzy_index",
+        description="Build the typo-suggestion index for a JSON dictionary and report its footprint and speed.")
+    parser.add_argument("json_file", help="Flat JSON object of English words to Hindi translations")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="Largest edit distance of a suggestion (default: %(default)s)")
+    parser.add_argument("--prefix-length", type=int, default=DEFAULT_PREFIX_LENGTH,
+                        help="Characters of each word expanded into deletes (default: %(default)s)")
+    parser.add_argument("--queries", type=int, default=2000, help="Misspelled words to time lookups with")
+    args = parser.parse_args(argv)
+
+    with open(args.json_file, "r", encoding="utf-8") as f:
+        words = [word.lower() for word in json.load(f)]
+    index = DeletionIndex(words, args.max_distance, args.prefix_length)
+    report = index.memory_report()
+    print(f"Indexed {report['words']} words into {report['entries']} entries in {report['build_seconds']:.2f}s.")
+    print(f"Memory: table {report['table_bytes'] / 2**20:.1f} MB, words {report['words_bytes'] / 2**20:.1f} MB, "
+          f"total {report['total_bytes'] / 2**20:.1f} MB.")
+
+    rng = random.Random(0)
+    queries = [_misspell(word, rng) for word in rng.sample(index.words, min(args.queries, len(index.words)))]
+    start = time.perf_counter()
+    found = sum(1 for query in queries if index.suggest(query) is not None)
+    elapsed = time.perf_counter() - start
+    if queries:
+        print(f"Looked up {len(queries)} misspelled words ({found} with a suggestion): "
+              f"{elapsed / len(queries) * 1000:.3f} ms per lookup.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
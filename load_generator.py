@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from latency_stats import percentile
+from translation_server import DEFAULT_PORT, HOST
+
+# Used when no --input file is given; mostly words from the built-in dictionary, with a few it lacks
+SAMPLE_SENTENCES = (
+    "I go to school.",
+    "Python is a powerful language.",
+    "She reads a good book every day.",
+    "Thank you for the beautiful flowers.",
+    "The children are playing in the garden.",
+    "We love to learn new things.",
+    "My friend works in a big city.",
+    "Good morning, how are you?",
+)
+
+
+class HTTPClient:
+    """One keep-alive HTTP/1.1 connection to the translation server"""
+
+    def __init__(self, port):
+        self.port = port
+        self._reader = self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send one request; returns (status code, decoded JSON body)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(HOST, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        response = json.loads(await self._reader.readexactly(int(headers["content-length"])))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, response
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+async def _client(port, sentences, batch_size, deadline, remaining, results, rng):
+    """Send requests back to back on one connection until the deadline or the request budget runs out"""
+    client = HTTPClient(port)
+    try:
+        while time.perf_counter() < deadline and remaining[0] > 0:
+            remaining[0] -= 1
+            payload = ({"text": rng.choice(sentences)} if batch_size == 1
+                       else {"texts": [rng.choice(sentences) for _ in range(batch_size)]})
+            start = time.perf_counter()
+            try:
+                status, _ = await client.request("POST", "/translate", payload)
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                status = None
+                client.close()
+            results.append((status, time.perf_counter() - start))
+    finally:
+        client.close()
+
+
+async def run_load(port, sentences, concurrency, requests, duration, batch_size, seed=0):
+    """Run `concurrency` closed-loop clients and return the report, including the server's /metrics"""
+    rng = random.Random(seed)
+    results = []
+    remaining = [requests] # Shared request budget
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(port, sentences, batch_size, start + duration, remaining, results,
+                                   random.Random(rng.random()))
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ok = sorted(latency for status, latency in results if status == 200)
+    client = HTTPClient(port)
+    try:
+        _, server_metrics = await client.request("GET", "/metrics")
+    finally:
+        client.close()
+    return {
+        "concurrency": concurrency,
+        "sentences_per_request": batch_size,
+        "seconds": round(elapsed, 3),
+        "requests": len(results),
+        "ok": len(ok),
+        "rejected": sum(1 for status, _ in results if status == 503),
+        "failed": sum(1 for status, _ in results if status not in (200, 503)),
+        "requests_per_sec": round(len(ok) / elapsed, 1) if elapsed > 0 else 0.0,
+        "sentences_per_sec": round(len(ok) * batch_size / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {name: round(percentile(ok, fraction) * 1000, 3)
+                       for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99.9", 0.999),
+                                              ("max", 1.0))},
+        "server": server_metrics,
+    }
+
+
+def main(argv=None):
+    """Command line entry point: load the local translation server and report throughput and tail latency"""
+    parser = argparse.ArgumentParser(
+        prog="python -m load_generator",
+        description="Send concurrent translation requests to a running translation_server and report "
+                    "throughput and latency percentiles.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Server port (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Clients sending requests at the same time, one connection each (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=10000, help="Total requests to send (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Stop after this many seconds even if requests are left (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Sentences per request; above 1 they are sent as a \"texts\" list (default: %(default)s)")
+    parser.add_argument("--input", help="Text file with one sentence per line (default: built-in sample sentences)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for picking sentences")
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sentences = SAMPLE_SENTENCES
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+        if not sentences:
+            parser.error(f"'{args.input}' contains no sentences")
+
+    try:
+        report = asyncio.run(run_load(args.port, sentences, args.concurrency, args.requests, args.duration,
+                                      args.batch_size, args.seed))
+    except OSError as e:
+        print(f"Could not reach the translation server on {HOST}:{args.port}: {e}")
+        return 1
+    latency = report["latency_ms"]
+    server = report["server"]
+    print(f"{report['ok']}/{report['requests']} requests succeeded in {report['seconds']:.2f}s "
+          f"({report['rejected']} rejected with 503, {report['failed']} failed).")
+    print(f"Throughput: {report['requests_per_sec']:.1f} requests/sec, "
+          f"{report['sentences_per_sec']:.1f} sentences/sec.")
+    print("Latency (ms): " + ", ".join(f"{name} {value:.2f}" for name, value in latency.items()))
+    print(f"Server: {server['batches']} batches, {server['average_batch_size']} sentences per batch on average.")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote the report to '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+import argparse
+import gzip
+import heapq
+import html
+import itertools
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+from compact_dict import CompactDictionary, CompactDictionaryWriter, DEFAULT_COMPACT_DICT_FILE
+
+# Entries sorted in memory at a time before being spilled to a temporary run file
+DEFAULT_RUN_SIZE = 200000
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_LINE_BREAK_RE = re.compile(r"<br\s*/?>|</?(?:p|div|li)\b[^>]*>|\n", re.I)
+# Sense numbering and part-of-speech markers such as "1.", "(1)", "[n]", "n." at the start of a gloss
+_GLOSS_PREFIX_RE = re.compile(r"^\s*(?:\(?\d+[.)]\s*|\[[^\]]*\]\s*|\([^)]*\)\s*|(?:n|v|adj|adv|prep|conj|pron)\.\s+)+", re.I)
+_GLOSS_SPLIT_RE = re.compile(r"[,;|/]")
+
+
+def read_ifo(ifo_path):
+    """Parse a StarDict .ifo file into a dict of its key=value settings"""
+    with open(ifo_path, "r", encoding="utf-8") as f:
+        first_line = f.readline().strip()
+        if first_line != "StarDict's dict ifo file":
+            raise ValueError(f"'{ifo_path}' is not a StarDict .ifo file")
+        info = {}
+        for line in f:
+            key, sep, value = line.strip().partition("=")
+            if sep:
+                info[key] = value
+    return info
+
+
+def _companion_file(ifo_path, extensions):
+    """Find the .idx/.dict file next to an .ifo, trying each extension in order"""
+    base = ifo_path[:-len(".ifo")] if ifo_path.endswith(".ifo") else ifo_path
+    for extension in extensions:
+        if os.path.exists(base + extension):
+            return base + extension
+    raise FileNotFoundError(f"No {' or '.join(extensions)} file found next to '{ifo_path}'")
+
+
+def iter_idx(idx_path, offset_bits=32):
+    """Stream (headword, offset, size) records from a StarDict .idx (or .idx.gz) file"""
+    entry_tail = struct.Struct(">QI" if offset_bits == 64 else ">II")
+    opener = gzip.open if idx_path.endswith(".gz") else open
+    with opener(idx_path, "rb") as f:
+        buffer = b""
+        position = 0
+        while True:
+            end = buffer.find(b"\0", position)
+            if end < 0 or end + 1 + entry_tail.size > len(buffer):
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    break
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            word = buffer[position:end].decode("utf-8", errors="replace")
+            offset, size = entry_tail.unpack_from(buffer, end + 1)
+            position = end + 1 + entry_tail.size
+            yield word, offset, size
+
+
+class DictzipReader:
+    """Random access to a dictzip (.dict.dz) file, decompressing one chunk at a time.
+
+    Falls back to sequential gzip reading if the file has no dictzip chunk table."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._chunk_length = None
+        self._chunk_offsets = []
+        self._cached_index = -1
+        self._cached_chunk = b""
+        header = self._file.read(10)
+        if header[:2] != b"\x1f\x8b":
+            raise ValueError(f"'{path}' is not a gzip file")
+        flags = header[3]
+        if flags & 0x04: # FEXTRA: look for the dictzip 'RA' subfield
+            extra_length = struct.unpack("<H", self._file.read(2))[0]
+            extra = self._file.read(extra_length)
+            i = 0
+            while i + 4 <= len(extra):
+                subfield_id = extra[i:i + 2]
+                subfield_length = struct.unpack_from("<H", extra, i + 2)[0]
+                if subfield_id == b"RA":
+                    _version, chunk_length, chunk_count = struct.unpack_from("<HHH", extra, i + 4)
+                    sizes = struct.unpack_from(f"<{chunk_count}H", extra, i + 10)
+                    self._chunk_length = chunk_length
+                    self._chunk_offsets = list(itertools.accumulate(sizes, initial=0))
+                i += 4 + subfield_length
+        if flags & 0x08: # FNAME
+            self._skip_zero_terminated()
+        if flags & 0x10: # FCOMMENT
+            self._skip_zero_terminated()
+        if flags & 0x02: # FHCRC
+            self._file.read(2)
+        self._data_start = self._file.tell()
+        if self._chunk_length is None:
+            self._file.close()
+            self._file = gzip.open(path, "rb")
+
+    def _skip_zero_terminated(self):
+        while self._file.read(1) not in (b"\0", b""):
+            pass
+
+    def _chunk(self, index):
+        if index != self._cached_index:
+            self._file.seek(self._data_start + self._chunk_offsets[index])
+            compressed = self._file.read(self._chunk_offsets[index + 1] - self._chunk_offsets[index])
+            self._cached_chunk = zlib.decompressobj(-zlib.MAX_WBITS).decompress(compressed)
+            self._cached_index = index
+        return self._cached_chunk
+
+    def read_at(self, offset, size):
+        if self._chunk_length is None:
+            self._file.seek(offset) # gzip seeks forward cheaply; idx offsets are usually ascending
+            return self._file.read(size)
+        parts = []
+        while size > 0:
+            index, start = divmod(offset, self._chunk_length)
+            piece = self._chunk(index)[start:start + size]
+            if not piece:
+                break
+            parts.append(piece)
+            offset += len(piece)
+            size -= len(piece)
+        return b"".join(parts)
+
+    def close(self):
+        self._file.close()
+
+
+class _PlainDictReader:
+    """Random access to an uncompressed .dict file"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+
+    def read_at(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+def _definition_text(data, same_type_sequence):
+    """Extract the first textual field of a StarDict entry's data"""
+    if same_type_sequence:
+        # Fields carry no type markers; only the last one lacks a terminator
+        if len(same_type_sequence) == 1:
+            return data.decode("utf-8", errors="replace")
+        return data.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+    position = 0
+    while position < len(data):
+        field_type = chr(data[position])
+        position += 1
+        if field_type.isupper(): # Binary field prefixed by its size
+            size = struct.unpack_from(">I", data, position)[0]
+            position += 4 + size
+            continue
+        end = data.find(b"\0", position)
+        end = len(data) if end < 0 else end
+        return data[position:end].decode("utf-8", errors="replace")
+    return ""
+
+
+def iter_stardict(ifo_path):
+    """Stream (headword, definition) pairs from a StarDict dictionary, one entry at a time"""
+    info = read_ifo(ifo_path)
+    idx_path = _companion_file(ifo_path, (".idx", ".idx.gz"))
+    dict_path = _companion_file(ifo_path, (".dict", ".dict.dz"))
+    offset_bits = int(info.get("idxoffsetbits", "32"))
+    same_type_sequence = info.get("sametypesequence", "")
+    reader = DictzipReader(dict_path) if dict_path.endswith(".dz") else _PlainDictReader(dict_path)
+    try:
+        for headword, offset, size in iter_idx(idx_path, offset_bits):
+            yield headword, _definition_text(reader.read_at(offset, size), same_type_sequence)
+    finally:
+        reader.close()
+
+
+def primary_gloss(definition):
+    """Pick the first translation out of a StarDict definition (HTML and numbering removed)"""
+    for line in _LINE_BREAK_RE.split(definition):
+        line = html.unescape(_TAG_RE.sub("", line))
+        line = _GLOSS_PREFIX_RE.sub("", line)
+        gloss = _GLOSS_SPLIT_RE.split(line, 1)[0].strip()
+        if gloss:
+            return gloss
+    return ""
+
+
+def sorted_unique(pairs, run_size=DEFAULT_RUN_SIZE):
+    """Sort (key, value) pairs by key with bounded memory, keeping the first value seen for each key.
+
+    Pairs are sorted in runs of `run_size`, spilled to temporary files and merged."""
+    runs = []
+    try:
+        sequence = itertools.count()
+        while True:
+            run = [(key, next(sequence), value) for key, value in itertools.islice(pairs, run_size)]
+            if not run:
+                break
+            run.sort()
+            run_file = tempfile.TemporaryFile("w+", encoding="utf-8")
+            for record in run:
+                run_file.write(json.dumps(record, ensure_ascii=False))
+                run_file.write("\n")
+            run_file.seek(0)
+            runs.append(run_file)
+        merged = heapq.merge(*((tuple(json.loads(line)) for line in run_file) for run_file in runs))
+        previous_key = None
+        for key, _sequence, value in merged:
+            if key != previous_key:
+                previous_key = key
+                yield key, value
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+
+class _JsonDictionaryWriter:
+    """Writes a flat JSON object one entry at a time (same shape create_extended_dictionary saves)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._file.write("{")
+        self._first = True
+
+    def add(self, key, value):
+        self._file.write("\n" if self._first else ",\n")
+        self._first = False
+        self._file.write(f"    {json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}")
+
+    def close(self):
+        self._file.write("\n}" if not self._first else "}")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        """Abandon the file without replacing `path`"""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+def _iter_inflections(entries_path, run_size):
+    """Sorted (inflected form, Hindi) pairs for every headword in a compact entries file"""
+    from translator_backend import inflection_candidates, lemma_candidates, load_wordnet_morphology
+    morphology = load_wordnet_morphology()
+    entries = CompactDictionary(entries_path)
+
+    def resolved_forms():
+        for headword in entries:
+            if " " in headword:
+                continue # Multi-word entries are matched by the translator's phrase trie
+            for form in inflection_candidates(headword, morphology):
+                if form in entries:
+                    continue # Direct lookup wins for words that are headwords themselves
+                for lemma in lemma_candidates(form):
+                    translation = entries.get(lemma)
+                    if translation:
+                        yield form, translation
+                        break
+
+    try:
+        yield from sorted_unique(resolved_forms(), run_size)
+    finally:
+        entries.close()
+
+
+def import_stardict(ifo_path, json_path=None, compact_path=None, inflections=True, run_size=DEFAULT_RUN_SIZE):
+    """Convert a StarDict dictionary into the translator's JSON and/or compact dictionary files.
+
+    Headwords are lowercased like add_word() does, and each entry keeps only its primary gloss.
+    Returns a dict of counts and timings."""
+    start = time.perf_counter()
+    stats = {"entries_read": 0, "skipped": 0, "words_written": 0, "inflections_written": 0}
+
+    def normalized_entries():
+        for headword, definition in iter_stardict(ifo_path):
+            stats["entries_read"] += 1
+            headword = headword.strip().lower()
+            gloss = primary_gloss(definition)
+            if not headword or not gloss:
+                stats["skipped"] += 1
+                continue
+            yield headword, gloss
+
+    json_writer = _JsonDictionaryWriter(json_path) if json_path else None
+    entries_path = f"{compact_path}.entries.tmp" if compact_path else None
+    entries_writer = CompactDictionaryWriter(entries_path) if compact_path else None
+    try:
+        for headword, gloss in sorted_unique(normalized_entries(), run_size):
+            if json_writer is not None:
+                json_writer.add(headword, gloss)
+            if entries_writer is not None:
+                entries_writer.add(headword, gloss)
+            stats["words_written"] += 1
+        if json_writer is not None:
+            json_writer.close()
+            json_writer = None
+        if entries_writer is not None:
+            entries_writer.close()
+            entries_writer = None
+            # Second pass: copy the entries and add the precomputed inflected forms
+            with CompactDictionaryWriter(compact_path) as writer:
+                entries = CompactDictionary(entries_path)
+                for headword, gloss in entries.items():
+                    writer.add(headword, gloss)
+                entries.close()
+                if inflections:
+                    try:
+                        for form, translation in _iter_inflections(entries_path, run_size):
+                            writer.add_inflection(form, translation)
+                            stats["inflections_written"] += 1
+                    except LookupError:
+                        print("NLTK 'wordnet' data not found. Writing the compact dictionary without inflections.")
+    finally:
+        if json_writer is not None:
+            json_writer.discard()
+        if entries_writer is not None:
+            entries_writer.discard()
+        if entries_path and os.path.exists(entries_path):
+            os.remove(entries_path)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["entries_per_second"] = stats["entries_read"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    print(f"Read {stats['entries_read']} StarDict entries ({stats['skipped']} skipped) and wrote "
+          f"{stats['words_written']} words and {stats['inflections_written']} inflected forms "
+          f"in {stats['seconds']:.2f}s ({stats['entries_per_second']:.0f} entries/sec).")
+    return stats
+
+
+def main(argv=None):
+    """Command line entry point: convert a StarDict dictionary for the translator"""
+    parser = argparse.ArgumentParser(
+        prog="python -m stardict_import",
+        description="Convert a StarDict English-Hindi dictionary (.ifo/.idx/.dict[.dz]) into the translator's "
+                    "dictionary files.")
+    parser.add_argument("ifo_file", help="Path to the StarDict .ifo file")
+    parser.add_argument("--json", dest="json_path", help="Write a flat JSON dictionary here "
+                                                         "(e.g. english_hindi_dict.json)")
+    parser.add_argument("--compact", dest="compact_path", nargs="?", const=DEFAULT_COMPACT_DICT_FILE,
+                        help=f"Write a compact memory-mapped dictionary here (default: {DEFAULT_COMPACT_DICT_FILE})")
+    parser.add_argument("--no-inflections", action="store_true",
+                        help="Skip the precomputed inflection table in the compact file (no WordNet needed)")
+    parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE,
+                        help="Entries sorted in memory at a time (bounds memory use)")
+    args = parser.parse_args(argv)
+    if not args.json_path and not args.compact_path:
+        args.compact_path = DEFAULT_COMPACT_DICT_FILE
+
+    import_stardict(args.ifo_file, json_path=args.json_path, compact_path=args.compact_path,
+                    inflections=not args.no_inflections, run_size=args.run_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Regenerate the small StarDict fixture in stardict/ used by tests/test_stardict_import.py"""
+import gzip
+import os
+import struct
+import zlib
+
+# (headword, HTML definition) in .idx order; the duplicates and odd glosses are deliberate
+ENTRIES = [
+    ("Apple", "<b>1.</b> सेब, सेव<br>2. सेब का पेड़"),
+    ("apple", "(n.) गलत अनुवाद"), # Same headword once lowercased: the first entry wins
+    ("book", "n. <i>किताब</i>; पुस्तक"),
+    ("fish & chips", "मछली &amp; चिप्स"),
+    ("good morning", "<div>[phrase] सुप्रभात</div>"),
+    ("empty", "<br><br>"), # No gloss at all: skipped
+    ("run", "<ol><li>दौड़ना</li><li>चलाना</li></ol>"),
+    ("water", "पानी | जल"),
+    ("zebra", " ".join(["ज़ेबरा"] * 20)), # Long enough to span several dictzip chunks
+]
+CHUNK_LENGTH = 64 # Tiny chunks so entries cross chunk boundaries
+
+
+def write_dictzip(path, data):
+    """Write `data` as a dictzip file: gzip with an 'RA' chunk table and independently inflatable chunks"""
+    chunks = []
+    for start in range(0, len(data), CHUNK_LENGTH):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+        piece = data[start:start + CHUNK_LENGTH]
+        last = start + CHUNK_LENGTH >= len(data)
+        chunks.append(compressor.compress(piece) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_FULL_FLUSH))
+    subfield = struct.pack("<HHH", 1, CHUNK_LENGTH, len(chunks)) + b"".join(struct.pack("<H", len(c)) for c in chunks)
+    extra = b"RA" + struct.pack("<H", len(subfield)) + subfield
+    with open(path, "wb") as f:
+        f.write(b"\x1f\x8b\x08\x04" + b"\0\0\0\0" + b"\x02\x03") # FEXTRA, no mtime
+        f.write(struct.pack("<H", len(extra)) + extra)
+        f.write(b"".join(chunks))
+        f.write(struct.pack("<II", zlib.crc32(data), len(data) & 0xFFFFFFFF))
+
+
+def main():
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stardict")
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, "fixture")
+    data = b""
+    index = b""
+    for headword, definition in ENTRIES:
+        encoded = definition.encode("utf-8")
+        index += headword.encode("utf-8") + b"\0" + struct.pack(">II", len(data), len(encoded))
+        data += encoded
+    with open(base + ".idx", "wb") as f:
+        f.write(index)
+    write_dictzip(base + ".dict.dz", data)
+    with open(base + ".ifo", "w", encoding="utf-8", newline="\n") as f:
+        f.write("StarDict's dict ifo file\nversion=2.4.2\nbookname=Test English-Hindi\n"
+                f"wordcount={len(ENTRIES)}\nidxfilesize={len(index)}\nsametypesequence=h\n")
+    assert gzip.decompress(open(base + ".dict.dz", "rb").read()) == data
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from translator_backend import fast_tokenize
+
+NLTKWordTokenizer = pytest.importorskip("nltk.tokenize").NLTKWordTokenizer
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "tokenizer_corpus.txt")
+
+
+def _corpus():
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("sentence", _corpus())
+def test_matches_nltk_word_tokenizer(sentence):
+    # Each corpus line is one sentence, so word_tokenize would hand it to NLTKWordTokenizer unchanged
+    # (apart from punkt's sentence splitting, which needs the punkt data)
+    assert fast_tokenize(sentence) == NLTKWordTokenizer().tokenize(sentence)
+    assert fast_tokenize(sentence.lower()) == NLTKWordTokenizer().tokenize(sentence.lower())
+
+
+def test_unmatched_characters_are_kept():
+    assert fast_tokenize("' hello") == ["'", "hello"]
+    assert fast_tokenize("'") == ["'"]
+
+
+def test_clitic_before_a_split_quote():
+    assert fast_tokenize("can't' good") == ["ca", "n't", "'", "good"]
+    assert fast_tokenize("it's' good") == ["it", "'s", "'", "good"]
@@ -0,0 +1,47 @@
+import json
+import os
+
+from compact_dict import CompactDictionary
+from stardict_import import DictzipReader, import_stardict
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "data", "stardict", "fixture.ifo")
+ZEBRA = " ".join(["ज़ेबरा"] * 20)
+EXPECTED = {
+    "apple": "सेब", # First of the two entries that lowercase to 'apple'; HTML and sense number removed
+    "book": "किताब", # "n." marker and <i> removed, first of the ';'-separated glosses
+    "fish & chips": "मछली & चिप्स", # Entities unescaped
+    "good morning": "सुप्रभात",
+    "run": "दौड़ना", # First list item
+    "water": "पानी",
+    "zebra": ZEBRA, # Spans several dictzip chunks
+}
+
+
+def test_dictzip_chunks_are_read_randomly():
+    reader = DictzipReader(FIXTURE[:-len(".ifo")] + ".dict.dz")
+    try:
+        assert reader._chunk_length == 64
+    finally:
+        reader.close()
+
+
+def test_import_writes_json_and_compact_files(tmp_path):
+    json_path = str(tmp_path / "dict.json")
+    compact_path = str(tmp_path / "dict.ehd")
+    stats = import_stardict(FIXTURE, json_path=json_path, compact_path=compact_path, inflections=False,
+                            run_size=3) # Several sorted runs even for this small fixture
+    assert stats["entries_read"] == 9
+    assert stats["skipped"] == 1 # The entry whose definition has no text
+    assert stats["words_written"] == len(EXPECTED)
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        assert json.load(f) == EXPECTED
+    compact = CompactDictionary(compact_path)
+    try:
+        assert dict(compact.items()) == EXPECTED
+        assert list(compact) == sorted(EXPECTED)
+        assert not compact.has_inflections
+        assert sorted(compact.phrase_keys()) == ["fish & chips", "good morning"]
+    finally:
+        compact.close()
+    assert sorted(os.listdir(tmp_path)) == ["dict.ehd", "dict.json"] # No temporary files left behind
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+from latency_stats import percentile
+from translation_server import MAX_BODY_BYTES, TranslationServer
+from translator_backend import EnglishHindiTranslator
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 1.0) == 100
+    assert percentile([], 0.5) == 0.0
+
+
+def test_health_follows_the_given_readiness_flag():
+    translator = EnglishHindiTranslator(fast_tokenizer=True, lazy=True, dictionary={"school": "स्कूल"})
+    assert TranslationServer(translator, batcher=None).health()["status"] == "warming_up"
+
+    ready = threading.Event() # Worker pool started; the translator itself is never warmed up in process mode
+    server = TranslationServer(translator, batcher=None, ready=ready)
+    assert server.health()["status"] == "warming_up"
+    ready.set()
+    assert server.health()["status"] == "ok"
+    assert asyncio.run(server.dispatch("GET", "/health", b""))[1]["status"] == "ok"
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+        self.wait_closed_called = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        self.wait_closed_called = True
+
+
+def send_request(server, request):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        writer = RecordingWriter()
+        await server.handle_connection(reader, writer)
+        return writer
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length, status", [("-1", b"400"), ("abc", b"400"), ("1e3", b"400"),
+                                            (str(MAX_BODY_BYTES + 1), b"413")])
+def test_bad_content_length_gets_an_error_response(length, status):
+    translator = EnglishHindiTranslator(fast_tokenizer=True, lazy=True, dictionary={"school": "स्कूल"})
+    server = TranslationServer(translator, batcher=None)
+    writer = send_request(server, f"POST /translate HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+    assert writer.data.startswith(b"HTTP/1.1 " + status)
+    assert b"Connection: close" in writer.data
+    assert writer.closed and writer.wait_closed_called
@@ -0,0 +1,408 @@
+import json
+import multiprocessing
+import threading
+
+import pytest
+
+from compact_dict import write_compact_dictionary
+import translator_backend
+from translator_backend import (EnglishHindiTranslator, LayeredDict, LRUCache, SentenceCache, check_nltk_data,
+                                read_journal, with_changes)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # The translator reads and writes english_hindi_dict.json in the current directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_translator(**kwargs):
+    kwargs.setdefault("fast_tokenizer", True)
+    kwargs.setdefault("lazy", True) # No WordNet needed
+    return EnglishHindiTranslator(**kwargs)
+
+
+# A tiny WordNet stand-in with morphy's behaviour: exceptions first, then suffix rules whose result is a known lemma
+STUB_SUBSTITUTIONS = {
+    "n": [("s", ""), ("ses", "s"), ("xes", "x"), ("ies", "y"), ("men", "man")],
+    "v": [("s", ""), ("ies", "y"), ("es", "e"), ("es", ""), ("ed", "e"), ("ed", ""), ("ing", "e"), ("ing", "")],
+    "a": [("er", ""), ("est", ""), ("er", "e"), ("est", "e")],
+    "r": [],
+}
+STUB_EXCEPTIONS = {
+    "n": {"children": ["child"], "leaves": ["leaf"]},
+    "v": {"ran": ["run"], "saw": ["see"], "went": ["go"]},
+    "a": {"better": ["good"]},
+    "r": {},
+}
+STUB_LEMMAS = {
+    "n": {"child", "leaf", "book", "box", "walk", "flower", "saw", "world"},
+    "v": {"run", "see", "go", "walk", "leave", "book"},
+    "a": {"good", "small"},
+    "r": set(),
+}
+
+
+class StubLemmatizer:
+    def lemmatize(self, word, pos="n"):
+        exceptions = STUB_EXCEPTIONS[pos]
+        if word in exceptions:
+            candidates = exceptions[word]
+        else:
+            candidates = [word[:len(word) - len(old)] + new for old, new in STUB_SUBSTITUTIONS[pos]
+                          if word.endswith(old)]
+        lemmas = [lemma for lemma in [word] + candidates if lemma in STUB_LEMMAS[pos]]
+        return min(lemmas, key=len) if lemmas else word
+
+
+def stub_morphology():
+    reverse_exceptions = {}
+    for exceptions in STUB_EXCEPTIONS.values():
+        for inflected, lemmas in exceptions.items():
+            for lemma in lemmas:
+                reverse_exceptions.setdefault(lemma, set()).add(inflected)
+    return {pos: list(rules) for pos, rules in STUB_SUBSTITUTIONS.items()}, reverse_exceptions
+
+
+@pytest.fixture
+def stub_wordnet(monkeypatch):
+    monkeypatch.setattr(translator_backend, "lemmatizer", StubLemmatizer())
+    monkeypatch.setattr(translator_backend, "load_wordnet_morphology", stub_morphology)
+
+
+def test_dictionary_size_counts_overlay_and_compact_words_once(workdir):
+    write_compact_dictionary("base.ehd", {"apple": "सेब", "banana": "केला", "hello": "नमस्ते"})
+    translator = make_translator(dictionary={"hello": "हैलो", "python": "पायथन"}, compact_dict_file="base.ehd")
+    assert translator.dictionary_size() == 4
+    translator.add_word("apple", "सेब") # Already in the compact dictionary
+    translator.add_word("mango", "आम")
+    translator.add_word("mango", "आम")
+    assert translator.dictionary_size() == 5
+    assert translator.dictionary_size() == translator.dictionary_snapshot().count_words()
+
+
+def test_torn_journal_tail_is_skipped(workdir):
+    entries = [json.dumps([english, hindi], ensure_ascii=False) for english, hindi in
+               (("mango", "आम"), ("banana", "केला"))]
+    # A crash while appending the second entry, in the middle of a multi-byte character
+    data = (entries[0] + "\n" + entries[1]).encode("utf-8")
+    (workdir / "english_hindi_dict.json.journal").write_bytes(data[:data.index("के".encode("utf-8")) + 2])
+    translator = make_translator()
+    assert translator.eng_to_hindi_dict["mango"] == "आम"
+    assert "banana" not in translator.eng_to_hindi_dict
+
+    translator.add_word("kiwi", "कीवी")
+    assert translator.create_extended_dictionary()[0]
+    assert dict(read_journal("english_hindi_dict.json.journal")) == {"mango": "आम", "kiwi": "कीवी"}
+
+
+def test_saving_to_another_file_exports_the_whole_dictionary(workdir):
+    write_compact_dictionary("base.ehd", {"apple": "सेब", "hello": "नमस्ते"})
+    translator = make_translator(dictionary={"hello": "हैलो"}, compact_dict_file="base.ehd")
+    translator.add_word("mango", "आम")
+    assert translator.create_extended_dictionary("export.json")[0]
+    with open("export.json", encoding="utf-8") as f:
+        assert json.load(f) == {"apple": "सेब", "hello": "हैलो", "mango": "आम"}
+    assert not (workdir / "export.json.journal").exists()
+
+
+def test_eng_to_hindi_dict_is_read_only(workdir):
+    translator = make_translator(dictionary={"hello": "नमस्ते"})
+    with pytest.raises(TypeError):
+        translator.eng_to_hindi_dict["mango"] = "आम"
+    assert translator.dictionary_size() == 1
+
+
+def test_check_nltk_data_needs_punkt_tab(tmp_path, monkeypatch):
+    import nltk.data
+    monkeypatch.setattr(nltk.data, "path", [str(tmp_path)])
+    monkeypatch.setattr(translator_backend, "NLTK_DATA_DOWNLOADED", False)
+    (tmp_path / "corpora" / "wordnet").mkdir(parents=True)
+    (tmp_path / "tokenizers" / "punkt" / "PY3").mkdir(parents=True) # Pre-3.8.2 pickles only
+    assert check_nltk_data() == {"punkt_tab": False, "wordnet": True}
+    (tmp_path / "tokenizers" / "punkt_tab" / "english").mkdir(parents=True)
+    assert check_nltk_data() == {"punkt_tab": True, "wordnet": True}
+
+
+def test_suggestion_index_builds_without_blocking_add_word(workdir):
+    translator = make_translator(dictionary={"garden": "बगीचा", "school": "विद्यालय"})
+    build = translator._new_suggestion_index
+
+    def build_while_adding(snapshot):
+        index = build(snapshot)
+        # add_word() needs the write lock, so this would time out if the build held it
+        writer = threading.Thread(target=translator.add_word, args=("flowers", "फूल"))
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+        return index
+
+    translator._new_suggestion_index = build_while_adding
+    translator.enable_suggestions(background=True).join(timeout=30)
+    assert translator.suggest("gardne") == "garden"
+    assert translator.suggest("flowres") == "flowers" # Added during the build
+
+
+PARALLEL_SENTENCES = ["I go to school.", "Thank you, my friend!", "The children are happy today."] * 5
+
+
+def test_batch_tokenizer_is_probed_once(workdir, monkeypatch, capsys):
+    probes = []
+
+    def missing_punkt(text):
+        probes.append(text)
+        raise LookupError("punkt_tab")
+
+    monkeypatch.setattr(translator_backend, "word_tokenize", missing_punkt)
+    translator = make_translator(dictionary={"hello": "नमस्ते"}, fast_tokenizer=False)
+    for _ in range(3):
+        assert translator.translate_batch(["hello there"]) == ["नमस्ते [there]"]
+    assert len(probes) == 1
+    assert capsys.readouterr().out.count("'punkt_tab' tokenizer not found") == 1
+
+
+def test_translate_parallel_matches_translate_batch(workdir):
+    translator = make_translator()
+    expected = translator.translate_batch(PARALLEL_SENTENCES)
+    assert list(translator.translate_parallel(PARALLEL_SENTENCES, workers=2, chunk_size=4)) == expected
+
+
+def test_translate_parallel_spawns_workers_while_other_threads_run(workdir, monkeypatch):
+    translator = make_translator()
+    translator.add_word("children", "बच्चे") # Must reach the spawned workers through snapshot()
+    expected = translator.translate_batch(PARALLEL_SENTENCES)
+    start_methods = []
+    get_context = multiprocessing.get_context
+
+    def recording_get_context(method=None):
+        start_methods.append(method)
+        return get_context(method)
+
+    monkeypatch.setattr(multiprocessing, "get_context", recording_get_context)
+    stop = threading.Event()
+    other_thread = threading.Thread(target=stop.wait) # E.g. a Streamlit session or the warmup thread
+    other_thread.start()
+    try:
+        result = list(translator.translate_parallel(PARALLEL_SENTENCES, workers=2, chunk_size=4))
+    finally:
+        stop.set()
+        other_thread.join()
+    assert start_methods == ["spawn"]
+    assert result == expected
+
+
+INFLECTION_DICTIONARY = {"run": "दौड़ना", "child": "बच्चा", "good": "अच्छा", "leaf": "पत्ती", "walk": "चलना",
+                         "book": "किताब", "see": "देखना", "box": "डिब्बा"}
+INFLECTED_FORMS = ["ran", "running", "runs", "children", "better", "leaves", "walked", "walking", "walks",
+                   "books", "booked", "saw", "seeing", "boxes", "flowers", "went", "smaller", "unknown"]
+
+
+def resolve_forms(translator):
+    """Translation of each INFLECTED_FORMS entry through the inflection index, or through the lemma cascade"""
+    current = translator.dictionary_snapshot()
+    if current.inflection_index_ready:
+        return {form: current.inflection_index.get(form) for form in INFLECTED_FORMS}
+    return {form: translator._lemma_fallback(current, form)[0] for form in INFLECTED_FORMS}
+
+
+def test_inflection_index_matches_the_lemma_cascade(workdir, stub_wordnet):
+    indexed = make_translator(dictionary=INFLECTION_DICTIONARY, lazy=False)
+    cascade = make_translator(dictionary=INFLECTION_DICTIONARY)
+    assert indexed.inflection_index_ready and not cascade.inflection_index_ready
+    forms = resolve_forms(indexed)
+    assert forms == resolve_forms(cascade)
+    assert forms["ran"] == forms["runs"] == "दौड़ना"
+    assert forms["saw"] == "देखना"
+    assert forms["leaves"] == "पत्ती"
+    assert forms["flowers"] is None and forms["unknown"] is None
+    assert indexed.translate("The children ran") == cascade.translate("The children ran")
+
+
+def test_add_word_updates_the_inflection_index_like_the_lemma_cascade(workdir, stub_wordnet):
+    indexed = make_translator(dictionary=INFLECTION_DICTIONARY, lazy=False)
+    cascade = make_translator(dictionary=INFLECTION_DICTIONARY)
+    edits = [
+        ("flower", "फूल"), # New headword: its forms get indexed
+        ("leave", "छोड़ना"), # "leaves" was indexed under the noun "leaf"; the verb lemma now takes priority
+        ("go", "जाना"), # Irregular form from the exception list
+        ("walk", ""), # Blanking an entry drops the forms that resolved to it
+        ("run", "भागना"), # Changing an entry re-points its forms
+    ]
+    for english, hindi in edits:
+        indexed.add_word(english, hindi)
+        cascade.add_word(english, hindi)
+        assert resolve_forms(indexed) == resolve_forms(cascade), english
+    forms = resolve_forms(indexed)
+    assert forms["flowers"] == "फूल"
+    assert forms["leaves"] == "छोड़ना"
+    assert forms["went"] == "जाना"
+    assert forms["walked"] is None and forms["walking"] is None
+    assert forms["ran"] == "भागना"
+
+
+def test_lru_cache_is_bounded_and_evicts_the_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1 # "b" is now the least recently used
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.info() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2}
+
+    disabled = LRUCache(maxsize=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None and len(disabled) == 0
+
+
+def test_token_cache_is_not_served_after_the_dictionary_changes(workdir):
+    translator = make_translator(dictionary={"hello": "नमस्ते", "world": "दुनिया"}, cache_size=100)
+    assert translator.translate("hello world") == "नमस्ते दुनिया"
+    assert translator.translate("hello world") == "नमस्ते दुनिया"
+    assert translator.token_cache.hits == 2
+    translator.add_word("hello", "हैलो")
+    assert translator.translate("hello world") == "हैलो दुनिया"
+
+
+def test_with_changes_layers_over_the_base_until_folded(monkeypatch):
+    monkeypatch.setattr(translator_backend, "MIN_LAYER_CHANGES", 2)
+    base = {"a": 1, "b": 2}
+    layered = with_changes(base, {"b": None, "c": 3})
+    assert isinstance(layered, LayeredDict) and layered.base is base
+    assert base == {"a": 1, "b": 2}
+    assert dict(layered) == {"a": 1, "c": 3} and len(layered) == 2
+    assert "b" not in layered and layered.get("b") is None and layered["c"] == 3
+    with pytest.raises(KeyError):
+        layered["b"]
+    folded = with_changes(layered, {"d": 4})
+    assert type(folded) is dict and folded == {"a": 1, "c": 3, "d": 4}
+    assert dict(layered) == {"a": 1, "c": 3}
+
+
+def test_add_word_shares_the_dictionary_and_index_between_versions(workdir, stub_wordnet):
+    translator = make_translator(dictionary=INFLECTION_DICTIONARY, lazy=False)
+    before = translator.dictionary_snapshot()
+    translator.add_word("flower", "फूल")
+    after = translator.dictionary_snapshot()
+    assert after.words.base is before.words
+    assert after.inflection_index.base is before.inflection_index
+    assert "flower" not in before.words and "flowers" not in before.inflection_index
+    assert translator.translate("flowers") == "फूल"
+
+
+def test_add_word_keeps_cached_tokens_of_unchanged_words(workdir, stub_wordnet):
+    translator = make_translator(dictionary=INFLECTION_DICTIONARY, lazy=False, cache_size=100)
+    assert translator.translate("children ran") == "बच्चा दौड़ना"
+    translator.add_word("flower", "फूल")
+    assert translator.translate("children ran") == "बच्चा दौड़ना"
+    assert translator.token_cache.hits == 2
+    translator.add_word("run", "भागना") # Changes "ran" through the inflection index
+    assert translator.translate("children ran") == "बच्चा भागना"
+    assert translator.token_cache.hits == 3
+    assert translator.translate("children ran") == "बच्चा भागना"
+    assert translator.token_cache.hits == 5
+
+
+def test_add_word_folds_its_changes_into_a_new_dictionary(workdir, stub_wordnet, monkeypatch):
+    monkeypatch.setattr(translator_backend, "MIN_LAYER_CHANGES", 2)
+    translator = make_translator(dictionary=INFLECTION_DICTIONARY, lazy=False, cache_size=100)
+    translator.translate("children")
+    edits = {"flower": "फूल", "small": "छोटा", "box": "बक्सा", "leave": "छोड़ना"}
+    folded = []
+    for english, hindi in edits.items():
+        translator.add_word(english, hindi)
+        current = translator.dictionary_snapshot()
+        folded.append(type(current.words) is dict)
+        if folded[-1]: # Folding starts a new epoch and drops every cached token
+            assert current.epoch == current.version
+            assert len(translator.token_cache) == 0
+    assert folded == [False, False, True, False] # The third change is over the limit; the fourth starts a new layer
+    assert translator.translate("flowers smaller boxes leaves children") == "फूल छोटा बक्सा छोड़ना बच्चा"
+    assert translator.dictionary_size() == len(INFLECTION_DICTIONARY) + 3 # "box" was already a headword
+
+
+PHRASE_DICTIONARY = {"new": "नया", "york": "यॉर्क", "city": "शहर", "delhi": "दिल्ली", "new york": "न्यूयॉर्क",
+                     "new york city": "न्यूयॉर्क शहर", "new delhi airport": "नई दिल्ली हवाई अड्डा"}
+
+
+def test_phrases_match_the_longest_entry_and_back_off_to_single_words(workdir):
+    translator = make_translator(dictionary=PHRASE_DICTIONARY)
+    assert translator.translate("new york city") == "न्यूयॉर्क शहर"
+    assert translator.translate("new york delhi") == "न्यूयॉर्क दिल्ली"
+    # "new delhi" only starts a phrase: both words are translated on their own
+    assert translator.translate("new delhi city") == "नया दिल्ली शहर"
+    assert translator.translate("new delhi airport") == "नई दिल्ली हवाई अड्डा"
+    assert translator.translate("york new") == "यॉर्क नया"
+
+
+def test_phrase_trie_is_built_on_first_use_and_follows_add_word(workdir):
+    translator = make_translator(dictionary=PHRASE_DICTIONARY)
+    assert translator.dictionary_snapshot().phrase_trie is None # Not built at startup
+    translator.add_word("york city", "यॉर्क शहर") # Before the trie exists
+    assert translator.translate("old york city") == "[old] यॉर्क शहर"
+    assert translator.dictionary_snapshot().phrase_trie is not None
+    translator.add_word("new delhi", "नई दिल्ली") # Inserted into the built trie
+    assert translator.translate("new delhi city") == "नई दिल्ली शहर"
+    assert translator.translate("new york city") == "न्यूयॉर्क शहर"
+
+
+SENTENCE_DICTIONARY = {"hello": "नमस्ते", "world": "दुनिया", "good": "अच्छा", "day": "दिन", "bye": "अलविदा"}
+
+
+def test_sentence_cache_keeps_a_sentence_another_session_still_shows(workdir):
+    translator = make_translator(dictionary=SENTENCE_DICTIONARY)
+    cache = translator.sentence_cache
+    translator.translate_document("Hello world. Good day.", session_id="a")
+    translator.translate_document("Hello world. Bye.", session_id="b")
+    assert len(cache) == 3 and cache.hits == 1
+    translator.translate_document("Bye.", session_id="a") # "Good day." was only shown by session a
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.end_session("b")
+    assert len(cache) == 1 # "Bye." is still shown by session a
+    translator.translate_document("Hello world. Bye.", session_id="a")
+    assert cache.hits == 3
+
+
+def test_sentence_cache_evicts_the_least_recently_used_sentence_over_its_byte_cap(workdir):
+    current = make_translator(dictionary=SENTENCE_DICTIONARY).dictionary_snapshot()
+    probe = SentenceCache()
+    probe.put(current, "one.", "1", ["one."])
+    cache = SentenceCache(max_bytes=2 * probe.bytes)
+    cache.put(current, "one.", "1", ["one."])
+    cache.put(current, "two.", "2", ["two."])
+    assert cache.get(current, "one.") == "1" # "two." is now the least recently used
+    cache.put(current, "six.", "6", ["six."])
+    assert len(cache) == 2 and cache.bytes <= cache.max_bytes and cache.evictions == 1
+    assert cache.get(current, "two.") is None
+    assert cache.get(current, "one.") == "1" and cache.get(current, "six.") == "6"
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_sentence_cache_is_not_served_after_add_word_changes_a_word(workdir, stub_wordnet, lazy):
+    translator = make_translator(dictionary=SENTENCE_DICTIONARY, lazy=lazy)
+    cache = translator.sentence_cache
+    assert translator.translate_document("Hello worlds. Good day.") == "नमस्ते दुनिया []. अच्छा दिन []."
+    translator.add_word("world", "जगत") # Also changes the inflected form "worlds"
+    assert translator.translate_document("Hello worlds. Good day.") == "नमस्ते जगत []. अच्छा दिन []."
+    # With the inflection index the changed words are known and the other sentence stays cached
+    assert cache.hits == (0 if lazy else 1)
+
+
+def test_stats_count_lookup_outcomes_and_top_oov_words(workdir, stub_wordnet):
+    dictionary = {"thank you": "धन्यवाद", "child": "बच्चा", "run": "दौड़ना", "to": "को", "school": "स्कूल"}
+    translator = make_translator(dictionary=dictionary, lazy=False, collect_stats=True)
+    sentence = "Thank you, children ran to school zzz zzz qqq."
+    first = translator.translate(sentence)
+    assert translator.translate_batch([sentence]) == [first] # Second time from the token cache
+    stats = translator.stats()
+    assert stats["sentences"] == 2
+    assert stats["tokens"] == 2 * 11
+    assert stats["phrase_hits"] == 2 * 1
+    assert stats["direct_hits"] == 2 * 2
+    assert stats["inflection_hits"] == 2 * 2
+    assert stats["punctuation"] == 2 * 2
+    assert stats["oov"] == 2 * 3
+    assert stats["top_oov"] == [("zzz", 4), ("qqq", 2)]
+    assert len(translator.token_cache) == 8 # One entry per distinct token, whether or not stats are on
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from http import HTTPStatus
+
+from latency_stats import percentile
+from translator_backend import EnglishHindiTranslator, download_nltk_data_once, init_worker, translate_in_worker
+
+# The server only ever listens on the loopback interface
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests arriving this long after the first request of a batch still join it
+DEFAULT_MAX_WAIT_MS = 5.0
+# Most sentences translated in one batch (a single larger request is still translated as a whole)
+DEFAULT_MAX_BATCH = 64
+# Requests waiting for a worker beyond this are turned away with 503 instead of queueing without bound
+DEFAULT_MAX_QUEUE = 256
+# Largest accepted request body, in bytes
+MAX_BODY_BYTES = 1 << 20
+# Latencies of the most recent requests kept for the percentiles in /metrics
+LATENCY_WINDOW = 10000
+
+
+class MicroBatcher:
+    """Groups the sentences of concurrent requests into batches and translates each batch on a worker pool.
+
+    One batching loop runs per worker, so a batch is only formed when a worker is free to take it;
+    while all workers are busy, new requests accumulate in the bounded queue and make up the next batch."""
+
+    def __init__(self, translate, executor, workers, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE):
+        self._translate = translate # Picklable callable: list of sentences -> list of translations
+        self._executor = executor
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(max_queue)
+        self._tasks = []
+        self.batches = 0
+        self.batched_sentences = 0
+        self.busy_workers = 0
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def submit(self, sentences):
+        """Queue `sentences` and return a future of their translations.
+        Raises asyncio.QueueFull when the queue is full, so the caller can reject the request."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((sentences, future))
+        return future
+
+    async def _next_batch(self):
+        """Wait for a request, then collect more until the batch is full or max_wait has passed"""
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        size = len(items[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._next_batch()
+            sentences = [sentence for batch, _ in items for sentence in batch]
+            self.busy_workers += 1
+            try:
+                translations = await loop.run_in_executor(self._executor, self._translate, sentences)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.busy_workers -= 1
+            self.batches += 1
+            self.batched_sentences += len(sentences)
+            start = 0
+            for batch, future in items:
+                if not future.done(): # Skips requests whose client has already gone away
+                    future.set_result(translations[start:start + len(batch)])
+                start += len(batch)
+
+
+class TranslationServer:
+    """Minimal HTTP/1.1 JSON API around EnglishHindiTranslator (keep-alive, no chunked bodies).
+
+    POST /translate  {"text": "..."} -> {"translation": "..."}, or {"texts": [...]} -> {"translations": [...]}
+    GET  /health     liveness plus warmup state; GET /metrics  request, batch, queue and latency counters
+
+    `ready` is anything with is_set() that tells /health when translations run at full speed;
+    it defaults to the translator's warmup_done."""
+
+    def __init__(self, translator, batcher, ready=None):
+        self.translator = translator
+        self.batcher = batcher
+        self.ready = ready if ready is not None else translator.warmup_done
+        self.started = time.time()
+        self.requests = 0
+        self.sentences = 0
+        self.rejected = 0 # 503: queue full
+        self.errors = 0 # 4xx/5xx other than rejections
+        self.latencies = deque(maxlen=LATENCY_WINDOW) # Seconds, successful translations only
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+                    break
+                method, path, version = parts
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if "transfer-encoding" in headers:
+                    status, payload = HTTPStatus.LENGTH_REQUIRED, {"error": "Send the body with a Content-Length"}
+                    keep_alive = False
+                else:
+                    length = headers.get("content-length") or "0"
+                    if not (length.isascii() and length.isdigit()):
+                        # Where the body ends is unknown, so the connection cannot be reused
+                        status, payload = HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"}
+                        keep_alive = False
+                    elif int(length) > MAX_BODY_BYTES:
+                        status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"}
+                        keep_alive = False
+                    else:
+                        body = await reader.readexactly(int(length))
+                        status, payload = await self.dispatch(method, path, body)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Client went away, or sent an oversized line
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass # Already reset by the client
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def dispatch(self, method, path, body):
+        """Route one request; returns (HTTPStatus, JSON-serializable payload)"""
+        path = path.split("?", 1)[0]
+        if path == "/translate" and method == "POST":
+            return await self.translate(body)
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, self.health()
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.metrics()
+        self.errors += 1
+        if path in ("/translate", "/health", "/metrics"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} is not supported on {path}"}
+        return HTTPStatus.NOT_FOUND, {"error": f"Unknown path '{path}'"}
+
+    async def translate(self, body):
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            request = json.loads(body)
+            single = "text" in request
+            sentences = [request["text"]] if single else request["texts"]
+            if not isinstance(sentences, list) or not all(isinstance(sentence, str) for sentence in sentences):
+                raise TypeError
+        except (ValueError, TypeError, KeyError):
+            self.errors += 1
+            return HTTPStatus.BAD_REQUEST, {"error": 'Expected a JSON object with "text" (a string) '
+                                                     'or "texts" (a list of strings)'}
+        try:
+            future = self.batcher.submit(sentences)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server busy, retry later"}
+        try:
+            translations = await future
+        except Exception as e:
+            self.errors += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Translation failed: {e}"}
+        self.sentences += len(sentences)
+        self.latencies.append(time.perf_counter() - start)
+        if single:
+            return HTTPStatus.OK, {"translation": translations[0]}
+        return HTTPStatus.OK, {"translations": translations}
+
+    def health(self):
+        return {"status": "ok" if self.ready.is_set() else "warming_up",
+                "dictionary_version": self.translator.dictionary_version,
+                "uptime_seconds": round(time.time() - self.started, 1)}
+
+    def metrics(self):
+        batcher = self.batcher
+        latencies = sorted(self.latencies)
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "sentences": self.sentences,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "batches": batcher.batches,
+            "average_batch_size": round(batcher.batched_sentences / batcher.batches, 2) if batcher.batches else 0.0,
+            "queue_depth": batcher.queue.qsize(),
+            "queue_capacity": batcher.queue.maxsize,
+            "busy_workers": batcher.busy_workers,
+            "workers": batcher.workers,
+            "latency_ms": {name: round(percentile(latencies, fraction) * 1000, 3)
+                           for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+            "translator": self.translator.stats(), # None with worker processes, which keep their own
+        }
+
+
+async def serve(translator, port=DEFAULT_PORT, workers=1, processes=False, max_batch=DEFAULT_MAX_BATCH,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE):
+    """Serve `translator` on localhost until cancelled"""
+    ready = None
+    if processes:
+        # Spawned, not forked: forking a process that runs an event loop and the warmup thread is unsafe
+        executor = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker, initargs=(translator.snapshot(),))
+        translate = translate_in_worker
+        ready = asyncio.Event() # Set once every worker has rebuilt its translator; the parent's is never warmed up
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="translate")
+        translate = translator.translate_batch
+    batcher = MicroBatcher(translate, executor, workers, max_batch, max_wait_ms, max_queue)
+    server = TranslationServer(translator, batcher, ready)
+    batcher.start()
+    listener = await asyncio.start_server(server.handle_connection, HOST, port)
+    print(f"Serving on http://{HOST}:{port} with {workers} worker {'processes' if processes else 'threads'}.")
+    try:
+        if processes:
+            # Start every worker now rather than during the first requests (which queue for them meanwhile)
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(executor, translate, []) for _ in range(workers)))
+            ready.set()
+            print(f"{workers} worker processes ready.")
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await batcher.stop()
+        executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    """Command line entry point: serve translations over HTTP on localhost"""
+    parser = argparse.ArgumentParser(
+        prog="python -m translation_server",
+        description=f"Serve English -> Hindi translations as a JSON HTTP API on {HOST} only.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Batches translated at the same time (default: 1; 0: one per CPU)")
+    parser.add_argument("--processes", action="store_true",
+                        help="Translate in worker processes instead of threads, to use several CPU cores")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="Most sentences per batch (default: %(default)s)")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="How long a batch waits for more requests (default: %(default)s)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Requests allowed to wait before new ones get 503 (default: %(default)s)")
+    parser.add_argument("--fast-tokenizer", action="store_true",
+                        help="Use the regex tokenizer instead of NLTK's word_tokenize")
+    parser.add_argument("--suggest", action="store_true",
+                        help="Translate misspelled words through the nearest dictionary word")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never download NLTK data; only use what is installed locally")
+    args = parser.parse_args(argv)
+
+    translator = EnglishHindiTranslator(fast_tokenizer=args.fast_tokenizer, lazy=True,
+                                        collect_stats=not args.processes, suggestions=args.suggest)
+    # The server accepts requests at once; /health reports "warming_up" until NLTK and the indexes are loaded
+    if not args.processes:
+        translator.warmup(background=True, download_missing=not args.offline)
+    elif not args.offline:
+        # Worker processes load NLTK and build their indexes themselves; the parent only fetches missing data
+        download_nltk_data_once()
+    try:
+        asyncio.run(serve(translator, args.port, args.workers or os.cpu_count() or 1, args.processes,
+                          args.max_batch, args.max_wait_ms, args.max_queue))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,186 @@
+import argparse
+import contextlib
+import itertools
 import json
+import math
+import multiprocessing
 import os
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+import re
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from collections import deque
+from collections import OrderedDict
+from collections.abc import Mapping
+from compact_dict import CompactDictionary, DEFAULT_COMPACT_DICT_FILE
+from fuzzy_index import DeletionIndex, DEFAULT_MAX_DISTANCE
 
 # Global variable to track NLTK download status
 NLTK_DATA_DOWNLOADED = False
 
+# NLTK resources the translator uses, and where nltk.data.find() looks for them.
+# word_tokenize reads the pickle-free 'punkt_tab' models since NLTK 3.8.2; the old 'punkt' package is not enough.
+NLTK_RESOURCES = {"punkt_tab": "tokenizers/punkt_tab/english/", "wordnet": "corpora/wordnet"}
+
+# Default number of distinct tokens kept in each translator's token cache
+DEFAULT_TOKEN_CACHE_SIZE = 50000
+
+# Saved edits allowed to pile up in a dictionary's journal before it is compacted in the background
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# JSON dictionary file loaded on startup; saves to it are journaled, saves to any other path are full exports
+EXTENDED_DICT_FILE = "english_hindi_dict.json"
+
+# Lines per task sent to a worker process by translate_parallel()
+DEFAULT_CHUNK_SIZE = 2000
+
+# Most frequent out-of-vocabulary words reported by stats(); at most 10x as many distinct words are tracked
+DEFAULT_STATS_TOP_N = 20
+
+# Approximate memory allowed for cached sentence translations, shared by all sessions
+DEFAULT_SENTENCE_CACHE_BYTES = 64 * 1024 * 1024
+# Sessions whose current sentences are tracked by the sentence cache (least recently active are dropped)
+DEFAULT_SENTENCE_CACHE_SESSIONS = 1000
+
+# Fewest add_word() changes layered over a dictionary before they are folded into a fresh copy of it; the limit
+# grows with the square root of the dictionary size, balancing copying the layer per edit against copying the base
+MIN_LAYER_CHANGES = 64
+
+# Characters stripped from a token before dictionary lookup
+PUNCTUATION_CHARS = '.,!?;:"\'()[]{}'
+
+# Splits a token into (leading punctuation, core, trailing punctuation); [\W_] is exactly "not str.isalnum()"
+_TOKEN_PARTS_RE = re.compile(r"([\W_]*)(.*?)([\W_]*)\Z", re.S)
+
+# --- Fast tokenizer ---
+# A single-pass regex that reproduces the tokens word_tokenize (punkt + NLTKWordTokenizer) gives for
+# ordinary prose, without loading punkt or running the Treebank substitution passes.
+_CLOSERS = "\\])}>\"'»”’"
+_SPLIT_PUNCT = ";@#$%&?!*\\[\\](){}<>\u2012-\u2015«“‘„»”’`"
+# Where word_tokenize has put a space by the time it splits off clitics, and by the time it splits off a
+# single quote followed by a space (which happens earlier, before brackets, dashes and quotes are padded)
+_BOUNDARY = r"(?:\s|$|[" + _SPLIT_PUNCT + r"\"]|''|[:,](?!\d)|\.{2,}|--|\.[" + _CLOSERS + r"]*(?:\s|$))"
+_EARLY_BOUNDARY = r"(?:\s|[«“‘„`;@#$%&?!\u2012-\u2015]|[:,](?!\d)|\.{2,}|\.[" + _CLOSERS + r"]*(?:\s|$))"
+# A clitic followed by a boundary; 'll, 're, 've and n't are split off in a later pass than 's, 'm, 'd and a
+# bare ', so for them a following quote that was split off counts as a boundary too
+_CLITIC = (r"(?:(?:'[sSmMdD]|')(?=" + _BOUNDARY + "|'" + _EARLY_BOUNDARY + r")"
+           r"|(?:'ll|'LL|'re|'RE|'ve|'VE|n't|N'T)(?=(?:'[sSmMdD]|')?" + _BOUNDARY + "))")
+_OPEN_QUOTE = r"(?<!\w)'(?!(?i:re|ve|ll|m|t|s|d|n)\b)(?=\w)"
+_FAST_TOKEN_RE = re.compile(
+    r"(?P<dots>\.{2,})"
+    r"|(?P<dashes>--)"
+    r"|(?P<quote>\"|'')"
+    r"|(?P<punct>`+|[" + _SPLIT_PUNCT + r"]|[:,](?!\d))"
+    r"|(?P<clitic>(?<=[^'\s])" + _CLITIC + r")"
+    r"|(?P<open_quote>" + _OPEN_QUOTE + r")"
+    # Characters that cannot start a clitic, quote, ellipsis or double dash skip the lookahead
+    r"|(?P<word>(?:[^\s:," + _SPLIT_PUNCT + r"\"'nN.\-]"
+    r"|(?!(?<=[^'\s])" + _CLITIC + r"|" + _OPEN_QUOTE + r"|''|\.{2,}|--)(?:[^\s:," + _SPLIT_PUNCT + r"\"]|[:,](?=\d)))+)"
+    r"|(?P<other>\S)" # Anything else (e.g. a lone quote) is its own token rather than dropped
+)
+_SENTENCE_END_RE = re.compile("[" + _CLOSERS + r"]*(?:\s|$)")
+_TRAILING_CHARS = " \t\n\r])}>\"'»”’"
+_QUOTE_OPENERS = " \t\n\r([{<«“‘„`"
+# Abbreviations whose period punkt keeps attached when they are not at the very end of the text
+_ABBREVIATIONS = frozenset("mr mrs ms dr prof sr jr st vs etc inc ltd co "
+                           "jan feb mar apr jun jul aug sep sept oct nov dec".split())
+_SPLIT_WORDS = {"cannot": ("can", "not"), "gimme": ("gim", "me"), "gonna": ("gon", "na"),
+                "gotta": ("got", "ta"), "lemme": ("lem", "me"), "wanna": ("wan", "na")}
+
+
+def fast_tokenize(text):
+    """Tokenize `text` like word_tokenize does for ordinary prose, using one precompiled regex"""
+    tokens = []
+    text_end = len(text.rstrip(_TRAILING_CHARS)) # A period followed only by these ends the text
+    for match in _FAST_TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        token = match.group()
+        if kind == "quote":
+            # word_tokenize turns opening double quotes into `` and closing ones into ''; a " at the very
+            # start opens, '' only opens after whitespace, a bracket or an opening quote
+            if match.start():
+                opens = text[match.start() - 1] in _QUOTE_OPENERS or (match.start() == 1 and text[0] == '"')
+                tokens.append("``" if opens else "''")
+            else:
+                tokens.append("``" if token == '"' else "''")
+        elif kind == "word":
+            if (token.endswith(".") and len(token) > 1 and token[-2] != "."
+                    and _SENTENCE_END_RE.match(text, match.end())):
+                stem = token[:-1]
+                # A sentence-final period is split off unless the word looks like an abbreviation
+                if match.end() >= text_end or not ("." in stem or len(stem) == 1 or stem in _ABBREVIATIONS):
+                    tokens.extend(_SPLIT_WORDS.get(stem, (stem,)))
+                    tokens.append(".")
+                    continue
+            tokens.extend(_SPLIT_WORDS.get(token, (token,)))
+        else:
+            tokens.append(token)
+    return tokens
+
+# Sentence boundary: end punctuation (plus closing quotes/brackets) followed by whitespace, or a line break
+_SENTENCE_SPLIT_RE = re.compile(r"([.!?]+)[" + _CLOSERS + r"]*[ \t]+|[ \t]*(?:\r?\n)+[ \t]*")
+
+
+def split_sentences(text):
+    """Split `text` into sentences (stripped, non-empty) for the sentence cache.
+    A period after an abbreviation or an initial (e.g. 'Dr.', 'U.S.', 'J.') does not end a sentence."""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_SPLIT_RE.finditer(text):
+        if match.group(1) == ".":
+            word_start = max(text.rfind(" ", start, match.start()), text.rfind("\t", start, match.start())) + 1
+            stem = text[max(word_start, start):match.start()].lstrip(PUNCTUATION_CHARS).lower()
+            if "." in stem or len(stem) == 1 or stem in _ABBREVIATIONS:
+                continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    sentence = text[start:].strip()
+    if sentence:
+        sentences.append(sentence)
+    return sentences
+
+def word_tokenize(text):
+    """NLTK's word_tokenize, imported on first use (NLTK takes a noticeable time to import)"""
+    global word_tokenize
+    from nltk.tokenize import word_tokenize
+    return word_tokenize(text)
+
+
+def check_nltk_data():
+    """Offline check: report which NLTK resources are installed locally, as {resource: True/False}.
+    Only searches the local NLTK data directories; never downloads anything or touches the network."""
+    global NLTK_DATA_DOWNLOADED
+    import nltk.data
+    available = {}
+    for resource, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+            available[resource] = True
+        except LookupError:
+            available[resource] = False
+    if all(available.values()):
+        NLTK_DATA_DOWNLOADED = True
+    return available
+
+
 def download_nltk_data_once():
     """Download required NLTK resources if not already downloaded in this session."""
     global NLTK_DATA_DOWNLOADED
     if NLTK_DATA_DOWNLOADED:
         # print("NLTK data already checked/downloaded in this session.") # Optional: less console noise
         return True
+    import nltk
 
-    resources = ['punkt', 'wordnet']
     all_successful = True
     
     print("Checking/Downloading NLTK resources...")
-    for resource in resources:
+    for resource, path in NLTK_RESOURCES.items():
         try:
-            if resource == 'punkt':
-                nltk.data.find(f'tokenizers/{resource}.zip')
-            elif resource == 'wordnet':
-                nltk.data.find(f'corpora/{resource}.zip') # or just 'corpora/{resource}'
+            nltk.data.find(path)
             print(f"NLTK resource '{resource}' already available.")
         except LookupError: # This is the correct exception for missing data
             print(f"NLTK resource '{resource}' not found. Attempting to download...")
@@ -50,12 +207,475 @@ def download_nltk_data_once():
     return all_successful
 
 
-lemmatizer = WordNetLemmatizer()
+class LazyLemmatizer:
+    """WordNetLemmatizer that imports NLTK and loads WordNet on first use.
+    Loading happens once, under a lock: NLTK's lazy corpus loader is not safe to trigger from several threads."""
 
-class EnglishHindiTranslator:
     def __init__(self):
+        self._lemmatizer = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load WordNet now and return the underlying WordNetLemmatizer.
+        Raises LookupError if the 'wordnet' data is not available."""
+        if self._lemmatizer is None:
+            with self._lock:
+                if self._lemmatizer is None:
+                    from nltk.stem import WordNetLemmatizer
+                    lemmatizer = WordNetLemmatizer()
+                    lemmatizer.lemmatize("loaded") # Forces the WordNet corpus to load
+                    self._lemmatizer = lemmatizer
+        return self._lemmatizer
+
+    def lemmatize(self, word, pos="n"):
+        return self.load().lemmatize(word, pos=pos)
+
+
+lemmatizer = LazyLemmatizer()
+
+# WordNet parts of speech tried by the lemma fallback, in order of preference
+LEMMA_POS_ORDER = ('v', 'n', 'a', 'r')
+
+
+def load_wordnet_morphology():
+    """Return WordNet's suffix rules per POS and a reverse (lemma -> inflected forms) exception map.
+    Raises LookupError if the 'wordnet' data is not available."""
+    lemmatizer.load() # Load WordNet under the lemmatizer's lock before touching it here
+    from nltk.corpus import wordnet
+    substitutions = {pos: list(wordnet.MORPHOLOGICAL_SUBSTITUTIONS[pos]) for pos in LEMMA_POS_ORDER}
+    reverse_exceptions = {}
+    for pos in LEMMA_POS_ORDER:
+        for inflected, lemmas in wordnet._exception_map[pos].items():
+            for lemma in lemmas:
+                reverse_exceptions.setdefault(lemma, set()).add(inflected)
+    return substitutions, reverse_exceptions
+
+
+def journal_path(dict_file):
+    """Path of the append-only edit journal that belongs to a JSON dictionary file"""
+    return f"{dict_file}.journal"
+
+
+def read_journal(path):
+    """Yield (english, hindi) edits from a journal file, oldest first.
+    A torn last line (e.g. from a crash mid-write, possibly inside a multi-byte character) is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                english, hindi = json.loads(line.decode('utf-8'))
+            except (ValueError, TypeError): # UnicodeDecodeError is a ValueError
+                continue
+            yield english, hindi
+
+
+def inflection_candidates(headword, morphology):
+    """Surface forms that WordNet's morphy could reduce to `headword` (exceptions plus reversed suffix rules).
+    `morphology` is the result of load_wordnet_morphology()."""
+    substitutions, reverse_exceptions = morphology
+    forms = set(reverse_exceptions.get(headword, ()))
+    for rules in substitutions.values():
+        for old, new in rules:
+            if headword.endswith(new):
+                forms.add(headword[:len(headword) - len(new)] + old)
+    forms.discard(headword)
+    return forms
+
+
+def lemma_candidates(form):
+    """Distinct lemmas of `form` in LEMMA_POS_ORDER priority, leaving out `form` itself
+    (only lemmas that differ from the form can help; direct lookup covers the rest)"""
+    return tuple(dict.fromkeys(
+        lemma for lemma in (lemmatizer.lemmatize(form, pos=pos) for pos in LEMMA_POS_ORDER)
+        if lemma != form))
+
+
+class LayeredDict(Mapping):
+    """Read-only mapping of a large base dict with a small dict of changes on top (a None value removes a key).
+    Publishing an edit copies only the changes, never the base, which is shared by every version."""
+
+    __slots__ = ("base", "changes")
+
+    def __init__(self, base, changes):
+        self.base = base
+        self.changes = changes
+
+    def get(self, key, default=None):
+        changes = self.changes
+        if key in changes:
+            value = changes[key]
+            return default if value is None else value
+        return self.base.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        if key in self.changes:
+            return self.changes[key] is not None
+        return key in self.base
+
+    def __iter__(self):
+        changes = self.changes
+        for key in self.base:
+            if key not in changes:
+                yield key
+        for key, value in changes.items():
+            if value is not None:
+                yield key
+
+    def __len__(self):
+        size = len(self.base)
+        for key, value in self.changes.items():
+            size += (value is not None) - (key in self.base)
+        return size
+
+
+def with_changes(mapping, changes):
+    """Return `mapping` (a dict or LayeredDict) with `changes` applied, without modifying it.
+    Only the changes accumulated since the last fold are copied; once there are too many of them
+    they are folded into a new plain dict (returned instead of a LayeredDict)."""
+    if isinstance(mapping, LayeredDict):
+        base = mapping.base
+        changes = {**mapping.changes, **changes}
+    else:
+        base = mapping
+        changes = dict(changes)
+    if len(changes) <= max(MIN_LAYER_CHANGES, math.isqrt(len(base))):
+        return LayeredDict(base, changes)
+    folded = dict(base)
+    for key, value in changes.items():
+        if value is None:
+            folded.pop(key, None)
+        else:
+            folded[key] = value
+    return folded
+
+
+class LRUCache:
+    """Size-bounded least-recently-used cache with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize=DEFAULT_TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock() # Streamlit sessions share one translator across threads
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store `value`, evicting the least recently used entry if the cache is full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        """Return the cache counters as a dict"""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._data), "maxsize": self.maxsize}
+
+
+class TranslationStats:
+    """Counters and cumulative timings collected by a translator created with collect_stats=True.
+
+    Each sentence is counted locally and merged under the lock once, so the per-token cost is a dict
+    update. Only the most frequent out-of-vocabulary words are kept (10x top_n distinct words at most)."""
+
+    def __init__(self, top_n=DEFAULT_STATS_TOP_N):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.sentences = 0
+        self.tokens = 0
+        self.tokenize_seconds = 0.0
+        self.lookup_seconds = 0.0
+        self.outcomes = Counter() # "direct", "phrase", "inflection", "lemma_<pos>", "suggestion", "punctuation", "oov"
+        self.oov_words = Counter()
+
+    def record(self, token_count, tokenize_seconds, lookup_seconds, outcomes, oov_words):
+        """Merge the counts of one translated sentence"""
+        with self._lock:
+            self.sentences += 1
+            self.tokens += token_count
+            self.tokenize_seconds += tokenize_seconds
+            self.lookup_seconds += lookup_seconds
+            self.outcomes.update(outcomes)
+            if oov_words:
+                self.oov_words.update(oov_words)
+                if len(self.oov_words) > 10 * self.top_n:
+                    # Keep the heaviest hitters; rare words may be undercounted, frequent ones are not lost
+                    self.oov_words = Counter(dict(self.oov_words.most_common(5 * self.top_n)))
+
+    def snapshot(self, reset=False):
+        """Return the collected statistics as a dict, optionally starting over afterwards"""
+        with self._lock:
+            outcomes = self.outcomes
+            snapshot = {
+                "sentences": self.sentences,
+                "tokens": self.tokens,
+                "tokenize_seconds": self.tokenize_seconds,
+                "lookup_seconds": self.lookup_seconds,
+                "direct_hits": outcomes["direct"],
+                "phrase_hits": outcomes["phrase"],
+                "inflection_hits": outcomes["inflection"],
+                "lemma_hits": {pos: outcomes[f"lemma_{pos}"] for pos in LEMMA_POS_ORDER},
+                "suggestion_hits": outcomes["suggestion"],
+                "punctuation": outcomes["punctuation"],
+                "oov": outcomes["oov"],
+                "top_oov": self.oov_words.most_common(self.top_n),
+            }
+            if reset:
+                self._reset()
+        return snapshot
+
+
+class SentenceCache:
+    """Byte-bounded LRU cache of sentence translations for one dictionary epoch (see DictionarySnapshot).
+
+    A cached translation is served for a later dictionary version of the same epoch unless one of the
+    sentence's words changed in between. Each session's current sentences are tracked: when a session
+    moves on to a new text, the sentences it no longer shows (and no other session shows) are evicted
+    right away. Whatever remains is evicted least recently used first once the cache holds more than `max_bytes`."""
+
+    def __init__(self, max_bytes=DEFAULT_SENTENCE_CACHE_BYTES, max_sessions=DEFAULT_SENTENCE_CACHE_SESSIONS):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.epoch = None # Dictionary epoch of the cached translations
+        # sentence -> (translation, approximate size in bytes, dictionary version, cleaned words of the sentence)
+        self._data = OrderedDict()
+        self._sessions = OrderedDict() # session id -> sentences of its current text
+        self._refs = {} # sentence -> number of sessions currently showing it
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_epoch(self, epoch):
+        """Drop everything cached for an older dictionary epoch; False if `epoch` is itself outdated"""
+        if epoch == self.epoch:
+            return True
+        if self.epoch is not None and epoch < self.epoch:
+            return False # A translation that started before the latest full change: don't mix versions
+        self._data.clear()
+        self.bytes = 0
+        self.epoch = epoch
+        return True
+
+    def get(self, current, sentence):
+        """Return the cached translation of `sentence` if it is valid for the dictionary snapshot `current`, or None"""
+        with self._lock:
+            entry = self._data.get(sentence) if self._check_epoch(current.epoch) else None
+            if entry is not None:
+                translation, _, version, words = entry
+                changed = current.changed
+                if version > current.version or (changed and any(changed.get(word, 0) > version
+                                                                 for word in words)):
+                    entry = None # Translated with a newer snapshot, or one of its words changed since
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(sentence)
+            self.hits += 1
+            return translation
+
+    def put(self, current, sentence, translation, english_words):
+        """Cache `translation` of `sentence` (tokenized as `english_words`) made with the snapshot `current`,
+        evicting least recently used sentences while over the memory cap"""
+        words = frozenset(word.strip(PUNCTUATION_CHARS) for word in english_words)
+        size = sys.getsizeof(sentence) + sys.getsizeof(translation) + sys.getsizeof(words)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._check_epoch(current.epoch):
+                return
+            old = self._data.pop(sentence, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[sentence] = (translation, size, current.version, words)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._evict(next(iter(self._data)))
+
+    def track(self, session_id, sentences):
+        """Record the sentences `session_id` now shows; evict those it dropped that no session shows"""
+        sentences = set(sentences)
+        with self._lock:
+            previous = self._sessions.pop(session_id, set())
+            self._sessions[session_id] = sentences
+            for sentence in sentences - previous:
+                self._refs[sentence] = self._refs.get(sentence, 0) + 1
+            released = previous - sentences
+            if len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                released = itertools.chain(released, oldest)
+            for sentence in released:
+                self._release(sentence)
+
+    def end_session(self, session_id):
+        """Forget a session, evicting the sentences only it was showing"""
+        with self._lock:
+            for sentence in self._sessions.pop(session_id, ()):
+                self._release(sentence)
+
+    def _release(self, sentence):
+        count = self._refs.get(sentence, 0) - 1
+        if count > 0:
+            self._refs[sentence] = count
+            return
+        self._refs.pop(sentence, None)
+        if sentence in self._data:
+            self._evict(sentence)
+
+    def _evict(self, sentence):
+        size = self._data.pop(sentence)[1]
+        self.bytes -= size
+        self.evictions += 1
+
+    def clear(self):
+        """Drop all cached translations (counters and session tracking are kept)"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        """Return the cache counters as a dict"""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._data),
+                "bytes": self.bytes, "max_bytes": self.max_bytes, "sessions": len(self._sessions),
+                "epoch": self.epoch}
+
+
+# Serializes the one-time build of a snapshot's phrase trie, so concurrent first readers build it once
+_PHRASE_TRIE_LOCK = threading.Lock()
+
+
+def build_phrase_trie(words, compact_dict=None):
+    """Build the token trie of multi-word entries (dictionary keys containing a space)"""
+    trie = {}
+    phrases = [word for word in words if " " in word]
+    if compact_dict is not None:
+        phrases.extend(compact_dict.phrase_keys())
+    for phrase in phrases:
+        tokens = fast_tokenize(phrase)
+        if len(tokens) < 2:
+            continue
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = phrase
+    if trie:
+        print(f"Phrase trie built with {len(phrases)} multi-word entries.")
+    return trie
+
+
+class DictionarySnapshot:
+    """One immutable, versioned state of a translator's dictionaries.
+
+    Readers take the current snapshot once per sentence and use it without locking; writers build
+    the next version from copies and publish it with a single attribute assignment (read-copy-update).
+    A single add_word() copies only a small LayeredDict of changes, not the dictionaries themselves.
+    Nothing reachable from a published snapshot is modified afterwards, except that its phrase trie
+    is filled in once, on first use (see phrases()).
+
+    Cached translations are keyed by epoch: the version of the last change that could affect any word.
+    Within an epoch, `changed` records the version at which each affected word last changed, so caches
+    only need to drop what involves those words."""
+
+    __slots__ = ("version", "words", "compact_dict", "inflection_index", "inflection_index_ready", "phrase_trie",
+                 "suggestion_index", "size", "epoch", "changed")
+
+    def __init__(self, version, words, compact_dict=None, inflection_index=None, inflection_index_ready=False,
+                 phrase_trie=None, suggestion_index=None, size=None, epoch=None, changed=None):
+        self.version = version
+        self.words = words # Overlay dictionary (a dict or LayeredDict) on top of the compact base dictionary
+        self.compact_dict = compact_dict # Optional memory-mapped base dictionary
+        self.inflection_index = inflection_index if inflection_index is not None else {} # form -> Hindi entry of its lemma
+        self.inflection_index_ready = inflection_index_ready
+        # Token trie of multi-word entries: token -> child node; the None key holds the phrase's dictionary key
+        self.phrase_trie = phrase_trie # None until first needed
+        self.suggestion_index = suggestion_index # fuzzy_index.DeletionIndex while typo suggestions are on
+        self.size = size # Distinct English words across both dictionaries; None until counted
+        self.epoch = epoch if epoch is not None else version
+        self.changed = changed if changed is not None else {} # cleaned word -> version it last changed at
+
+    def count_words(self):
+        """Count the distinct English words across the overlay and the compact base dictionary"""
+        if self.compact_dict is None:
+            return len(self.words)
+        return len(self.compact_dict) + sum(1 for word in self.words if word not in self.compact_dict)
+
+    def replace(self, **changes):
+        """Return the next version of this snapshot with `changes` applied (fields not changed are shared).
+        The new version starts a new epoch unless the writer passes the `changed` words itself."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        if "words" in changes or "compact_dict" in changes:
+            fields["size"] = None # Recounted on publishing unless the writer keeps it up to date itself
+            fields["phrase_trie"] = None # Rebuilt on first use unless the writer keeps it up to date itself
+        fields.update(changes)
+        fields["version"] = self.version + 1
+        if "changed" not in changes:
+            fields["epoch"], fields["changed"] = fields["version"], {}
+        return DictionarySnapshot(**fields)
+
+    def phrases(self):
+        """The token trie of multi-word entries, built on first use.
+        Scanning a large compact dictionary for phrase keys is left out of startup and process spawning."""
+        trie = self.phrase_trie
+        if trie is None:
+            with _PHRASE_TRIE_LOCK:
+                trie = self.phrase_trie
+                if trie is None:
+                    trie = self.phrase_trie = build_phrase_trie(self.words, self.compact_dict)
+        return trie
+
+    def lookup(self, word):
+        """Look `word` up in the overlay dictionary, then in the compact base dictionary"""
+        translation = self.words.get(word)
+        if not translation and self.compact_dict is not None:
+            translation = self.compact_dict.get(word)
+        return translation
+
+
+class EnglishHindiTranslator:
+    def __init__(self, cache_size=DEFAULT_TOKEN_CACHE_SIZE, fast_tokenizer=False, dictionary=None,
+                 compact_dict_file=DEFAULT_COMPACT_DICT_FILE, sentence_cache_bytes=DEFAULT_SENTENCE_CACHE_BYTES,
+                 lazy=False, collect_stats=False, suggestions=False, suggestion_distance=DEFAULT_MAX_DISTANCE):
+        init_start = time.perf_counter()
         # Start with a small set of common words
-        self.eng_to_hindi_dict = {
+        words = {
             # Numbers
             "zero": "शून्य", "one": "एक", "two": "दो", "three": "तीन", "four": "चार",
             "five": "पांच", "six": "छः", "seven": "सात", "eight": "आठ", "nine": "नौ", "ten": "दस",
@@ -111,22 +731,267 @@ class EnglishHindiTranslator:
             "example": "उदाहरण", "simple": "सरल", "powerful": "शक्तिशाली", "every": "हर", "all": "सब",
             "some": "कुछ", "many": "बहुत"
         }
-        self.initial_dict_size = len(self.eng_to_hindi_dict)
+        self.initial_dict_size = len(words)
         self.extended_dict_message = "" # To store messages for Streamlit UI
-        self.load_extended_dictionary()
+        # Words added since the last save; create_extended_dictionary() appends them to the journal
+        self._pending_edits = {}
+        self._journal_entries = 0
+        self._journal_lock = threading.Lock()
+        self._compaction_lock = threading.Lock()
+        # (dictionary epoch, token[, version its word changed at]) -> (rendered translation or bracketed OOV marker,
+        # lookup outcome, cleaned word); cleared whenever a new epoch is published
+        self.token_cache = LRUCache(cache_size)
+        # Sentence -> translation for translate_document(); holds one dictionary epoch at a time
+        self.sentence_cache = SentenceCache(sentence_cache_bytes)
+        # Use the regex tokenizer instead of NLTK's word_tokenize (no punkt needed)
+        self.fast_tokenizer = fast_tokenizer
+        # Per-stage timings and lookup outcomes; None (no bookkeeping at all) unless enabled
+        self._stats = TranslationStats() if collect_stats else None
+        # Translate unknown words through the nearest headword within `suggestion_distance` edits (opt-in)
+        self.suggestions = suggestions
+        self.suggestion_distance = suggestion_distance
+
+        # Startup measurements in seconds: "init", then "warmup" and "first_translation" once they happen
+        self.timings = {}
+        # lazy=True defers building the inflection index to warmup(); until then inflected forms are lemmatized
+        # word by word, and WordNet itself is loaded by the first word that needs it
+        self._index_deferred = lazy
+        self.warmup_done = threading.Event()
+        self.nltk_data = None # Result of check_nltk_data(), filled in by warmup()
+        self._batch_tokenize = None # Tokenizer picked by the first batch; probed again after warmup()
+
+        # Bookkeeping for the inflection index; only writers touch it, always under _write_lock
+        self._morphology = None # (suffix rules, reverse exceptions), loaded with the index
+        self._form_lemmas = {} # surface form -> candidate lemmas in LEMMA_POS_ORDER priority
+        self._forms_by_lemma = {} # lemma -> surface forms that may resolve to it
+        self._indexed_headwords = set()
+
+        # The published dictionary state; replaced as a whole (never mutated) by writers holding _write_lock
+        self._write_lock = threading.RLock()
+        self._snapshot = DictionarySnapshot(0, words)
+        compact_message = self.load_compact_dictionary(compact_dict_file) if compact_dict_file else ""
+        if dictionary is None:
+            self.load_extended_dictionary()
+        else:
+            # Rebuilding from a snapshot (e.g. in a worker process): skip the JSON file entirely
+            with self._write_lock:
+                staged = self._snapshot.replace(words=dict(dictionary))
+                if not self._index_deferred:
+                    self._build_inflection_index(staged)
+                    if suggestions:
+                        self._build_suggestion_index(staged)
+                self._publish(staged)
+            self.extended_dict_message = f"Using a snapshot dictionary of {len(dictionary)} words."
+        if compact_message:
+            self.extended_dict_message = f"{compact_message} {self.extended_dict_message}"
+        self.timings["init"] = time.perf_counter() - init_start
+
+    def warmup(self, background=False, download_missing=False):
+        """Import NLTK, load punkt_tab and WordNet and build the inflection index and phrase trie ahead of the
+        first translation.
+
+        With background=True this runs in a daemon thread (which is returned), so a server can start
+        answering immediately; warmup_done is set when it finishes. Missing NLTK data is downloaded only
+        if download_missing=True; otherwise nothing here touches the network."""
+        if background:
+            thread = threading.Thread(target=self.warmup, kwargs={"download_missing": download_missing},
+                                      name="translator-warmup", daemon=True)
+            thread.start()
+            return thread
+
+        start = time.perf_counter()
+        try:
+            if download_missing:
+                download_nltk_data_once()
+            self.nltk_data = check_nltk_data()
+            self._batch_tokenize = None # punkt_tab may have just been downloaded
+            if self.nltk_data["wordnet"]:
+                lemmatizer.lemmatize("warmup")
+                with self._write_lock:
+                    self._index_deferred = False
+                    if not self._snapshot.inflection_index_ready:
+                        staged = self._snapshot.replace()
+                        self._build_inflection_index(staged)
+                        if staged.inflection_index_ready:
+                            self._publish(staged)
+            if self.nltk_data["punkt_tab"] and not self.fast_tokenizer:
+                word_tokenize("Warm up.")
+            self._snapshot.phrases()
+            if self.suggestions:
+                self.enable_suggestions()
+        except Exception as e:
+            print(f"Error during warmup: {e}")
+            if self.nltk_data is None:
+                self.nltk_data = dict.fromkeys(NLTK_RESOURCES, False)
+        finally:
+            self.timings["warmup"] = time.perf_counter() - start
+            self.warmup_done.set()
+        missing = [resource for resource, found in (self.nltk_data or {}).items() if not found]
+        print(f"Warmup finished in {self.timings['warmup']:.2f}s"
+              + (f" (missing NLTK data: {', '.join(missing)})." if missing else "."))
+        return self.nltk_data
+
+    @property
+    def eng_to_hindi_dict(self):
+        """The current overlay dictionary as a read-only view; use add_word() to change it"""
+        return types.MappingProxyType(self._snapshot.words)
+
+    @property
+    def compact_dict(self):
+        """The current memory-mapped base dictionary, or None"""
+        return self._snapshot.compact_dict
+
+    @property
+    def inflection_index_ready(self):
+        """True once the current snapshot carries a complete inflection index"""
+        return self._snapshot.inflection_index_ready
+
+    @property
+    def dictionary_version(self):
+        """Version of the current dictionary snapshot; it increases every time the dictionary changes"""
+        return self._snapshot.version
+
+    def dictionary_snapshot(self):
+        """Return the current immutable DictionarySnapshot (consistent however long it is held)"""
+        return self._snapshot
+
+    def enable_stats(self, enabled=True, top_n=DEFAULT_STATS_TOP_N):
+        """Start (or stop) collecting per-stage timings and lookup outcomes; starting discards earlier stats"""
+        self._stats = TranslationStats(top_n) if enabled else None
+
+    def stats(self, reset=False):
+        """Return the statistics collected since the last reset (None when collection is off).
+
+        Keys: sentences, tokens, tokenize_seconds, lookup_seconds, direct_hits, phrase_hits, inflection_hits,
+        lemma_hits (per WordNet POS), suggestion_hits, punctuation, oov and top_oov ([(word, count), ...]).
+        Sentences served from the sentence cache by translate_document() are not counted again, and
+        worker processes of translate_parallel() keep their own statistics, which are not included."""
+        stats = self._stats
+        return stats.snapshot(reset) if stats is not None else None
+
+    def reset_stats(self):
+        """Return the current statistics and start counting from zero"""
+        return self.stats(reset=True)
+
+    def enable_suggestions(self, enabled=True, background=False):
+        """Turn typo suggestions for unknown words on or off for every caller of this translator.
+
+        The index is built without holding the write lock, so translations and add_word() carry on meanwhile;
+        words added during the build are indexed before it is published. With background=True the build runs
+        in a daemon thread, which is returned."""
+        if background:
+            thread = threading.Thread(target=self.enable_suggestions, args=(enabled,),
+                                      name="suggestion-index", daemon=True)
+            thread.start()
+            return thread
+
+        self.suggestions = enabled
+        base = self._snapshot
+        if not enabled:
+            if base.suggestion_index is not None:
+                with self._write_lock:
+                    self._publish(self._snapshot.replace(suggestion_index=None))
+            return None
+        if base.suggestion_index is not None:
+            return None
+        index = self._new_suggestion_index(base)
+        with self._write_lock:
+            current = self._snapshot
+            if not self.suggestions or current.suggestion_index is not None:
+                return None
+            if current.compact_dict is not base.compact_dict: # A new base dictionary was loaded meanwhile
+                index = self._new_suggestion_index(current)
+            else:
+                index = index.with_words([word for word in current.words if word not in base.words])
+            self._publish(current.replace(suggestion_index=index))
+        return None
+
+    def suggest(self, word):
+        """Return the headword nearest to a misspelled `word`, or None (always None while suggestions are off)"""
+        index = self._snapshot.suggestion_index
+        return index.suggest(word.lower()) if index is not None else None
+
+    def suggestion_index_report(self):
+        """Size and approximate memory use of the suggestion index (see DeletionIndex.memory_report()), or None"""
+        index = self._snapshot.suggestion_index
+        return index.memory_report() if index is not None else None
+
+    def _publish(self, staged):
+        """Make `staged` the current dictionary in one atomic assignment (caller holds _write_lock)"""
+        if staged.size is None:
+            staged.size = staged.count_words() # Once per published version, not on every dictionary_size() call
+        new_epoch = staged.epoch != self._snapshot.epoch
+        self._snapshot = staged
+        if new_epoch:
+            self.token_cache.clear() # Entries are epoch-keyed; this only frees the memory early
+            self.sentence_cache.clear()
+
+    def load_compact_dictionary(self, dict_file=DEFAULT_COMPACT_DICT_FILE):
+        """Memory-map a compact dictionary file (see compact_dict.py) as the base dictionary"""
+        if not os.path.exists(dict_file):
+            return ""
+        try:
+            compact_dict = CompactDictionary(dict_file)
+        except Exception as e:
+            message = f"Error opening compact dictionary '{dict_file}': {e}"
+            print(message)
+            return message
+        with self._write_lock:
+            # The previous file is not closed: readers may still hold a snapshot that maps it.
+            # Its mapping is released once the last such snapshot is dropped.
+            current = self._snapshot
+            staged = current.replace(compact_dict=compact_dict)
+            if current.suggestion_index is not None:
+                self._build_suggestion_index(staged)
+            self._publish(staged)
+        inflections = "with" if compact_dict.has_inflections else "without"
+        message = f"Mapped {len(compact_dict)} words from '{dict_file}' ({inflections} inflection table)."
+        print(message)
+        return message
+
+    def dictionary_size(self):
+        """Number of distinct English words across the overlay and the compact base dictionary"""
+        current = self._snapshot
+        return current.size if current.size is not None else current.count_words()
+
+    def snapshot(self):
+        """Return a picklable description of this translator, for rebuilding it in another process"""
+        current = self._snapshot
+        return {"cache_size": self.token_cache.maxsize, "fast_tokenizer": self.fast_tokenizer,
+                "dictionary": dict(current.words),
+                "compact_dict_file": current.compact_dict.path if current.compact_dict is not None else None,
+                "suggestions": self.suggestions, "suggestion_distance": self.suggestion_distance}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Build a translator from the output of snapshot()"""
+        return cls(cache_size=snapshot["cache_size"], fast_tokenizer=snapshot["fast_tokenizer"],
+                   dictionary=snapshot["dictionary"], compact_dict_file=snapshot["compact_dict_file"],
+                   suggestions=snapshot["suggestions"], suggestion_distance=snapshot["suggestion_distance"])
         
     def load_extended_dictionary(self):
         """Load a larger dictionary from a JSON file if available"""
-        dict_file = "english_hindi_dict.json"
-        
+        dict_file = EXTENDED_DICT_FILE
+        with self._write_lock:
+            staged = self._snapshot.replace(words=dict(self._snapshot.words))
+            self._load_extended_words(staged.words, dict_file)
+            if not self._index_deferred:
+                self._build_inflection_index(staged)
+                if self.suggestions:
+                    self._build_suggestion_index(staged)
+            self._publish(staged)
+        # print(f"Current dictionary has {len(self.eng_to_hindi_dict)} words") # For console logging
+
+    def _load_extended_words(self, words, dict_file):
+        """Merge the JSON dictionary file and its journal into `words` (a staged copy)"""
         if os.path.exists(dict_file):
             try:
                 with open(dict_file, 'r', encoding='utf-8') as f:
                     extended_dict = json.load(f)
                 
-                original_size_before_update = len(self.eng_to_hindi_dict)
-                self.eng_to_hindi_dict.update(extended_dict)
-                words_added_from_file = len(self.eng_to_hindi_dict) - original_size_before_update
+                original_size_before_update = len(words)
+                words.update(extended_dict)
+                words_added_from_file = len(words) - original_size_before_update
                 
                 self.extended_dict_message = (f"Loaded {words_added_from_file} new/updated words from '{dict_file}'. "
                                               f"Total words from file: {len(extended_dict)}.")
@@ -140,33 +1005,468 @@ class EnglishHindiTranslator:
         else:
             self.extended_dict_message = f"No extended dictionary ('{dict_file}') found. Using basic dictionary of {self.initial_dict_size} words."
             print(self.extended_dict_message)
-        # print(f"Current dictionary has {len(self.eng_to_hindi_dict)} words") # For console logging
+
+        # Replay edits saved since the last compaction (an interrupted compaction's journal first)
+        journal = journal_path(dict_file)
+        replayed = 0
+        for path in (f"{journal}.compacting", journal):
+            for english, hindi in read_journal(path):
+                words[english] = hindi
+                replayed += 1
+        self._journal_entries = replayed
+        if replayed:
+            journal_message = f"Replayed {replayed} saved edits from '{journal}'."
+            self.extended_dict_message = f"{self.extended_dict_message} {journal_message}"
+            print(journal_message)
     
-    def create_extended_dictionary(self, file_path="english_hindi_dict.json"):
-        """Creates a JSON file with the current dictionary"""
+    def create_extended_dictionary(self, file_path=EXTENDED_DICT_FILE):
+        """Save the words added since the last save by appending them to the dictionary's journal.
+        The cost depends only on the number of changes; the JSON file itself is rewritten by compact_dictionary().
+        Any other `file_path` gets a full export of the current dictionary instead (see export_dictionary())."""
+        if os.path.abspath(file_path) != os.path.abspath(EXTENDED_DICT_FILE):
+            return self.export_dictionary(file_path)
+        journal = journal_path(file_path)
+        with self._journal_lock:
+            edits = self._pending_edits
+            if not edits:
+                return True, f"No unsaved changes; {file_path} is up to date."
+            self._pending_edits = {}
+            try:
+                # Terminate a torn last line left by a crash so it cannot swallow the next entry
+                torn_line = False
+                if os.path.exists(journal) and os.path.getsize(journal) > 0:
+                    with open(journal, 'rb') as f:
+                        f.seek(-1, os.SEEK_END)
+                        torn_line = f.read(1) != b"\n"
+                with open(journal, 'a', encoding='utf-8') as f:
+                    if torn_line:
+                        f.write("\n")
+                    for english, hindi in edits.items():
+                        f.write(json.dumps([english, hindi], ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                # Keep the edits (and any newer ones) pending so the next save retries them
+                edits.update(self._pending_edits)
+                self._pending_edits = edits
+                message = f"Error saving dictionary: {e}"
+                print(message)
+                return False, message
+            self._journal_entries += len(edits)
+            journal_entries = self._journal_entries
+
+        message = f"Dictionary successfully saved: {len(edits)} changed words appended to {journal}"
+        if journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact_dictionary(file_path, background=True)
+            message += f". Compacting {journal_entries} journal entries into {file_path} in the background"
+        print(message)
+        return True, message
+
+    def export_dictionary(self, file_path):
+        """Write the whole current dictionary (compact file words plus session words) to a standalone JSON file.
+        Unlike create_extended_dictionary() this does not touch the journal, so unsaved changes stay pending."""
+        current = self._snapshot
+        try:
+            merged = dict(current.compact_dict.items()) if current.compact_dict is not None else {}
+            merged.update(current.words)
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(sorted(merged.items())), f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            message = f"Error exporting dictionary: {e}"
+            print(message)
+            return False, message
+        message = f"Dictionary successfully exported with {len(merged)} words to {file_path}"
+        print(message)
+        return True, message
+
+    def compact_dictionary(self, file_path=EXTENDED_DICT_FILE, background=False):
+        """Fold the journal into the JSON dictionary file, replacing it atomically"""
+        if background:
+            thread = threading.Thread(target=self.compact_dictionary, args=(file_path,),
+                                      name="dictionary-compaction", daemon=True)
+            thread.start()
+            return True, "Dictionary compaction started in the background."
+
+        if not self._compaction_lock.acquire(blocking=False):
+            return True, "Dictionary compaction is already running."
+        journal = journal_path(file_path)
+        compacting = f"{journal}.compacting"
         try:
-         
-            dict_to_save = self.eng_to_hindi_dict
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                # Sort dictionary for consistent output, if desired
-                sorted_dict = dict(sorted(dict_to_save.items()))
-                json.dump(sorted_dict, f, ensure_ascii=False, indent=4)
-            message = f"Dictionary successfully saved with {len(sorted_dict)} words to {file_path}"
+            # New saves go to a fresh journal while the rotated one is merged
+            with self._journal_lock:
+                if not os.path.exists(compacting) and os.path.exists(journal):
+                    os.replace(journal, compacting)
+                    self._journal_entries = 0
+
+            merged = {}
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    merged = json.load(f)
+            merged.update(read_journal(compacting))
+
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(sorted(merged.items())), f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+            if os.path.exists(compacting):
+                os.remove(compacting)
+            message = f"Dictionary compacted: {len(merged)} words written to {file_path}"
             print(message)
             return True, message
         except Exception as e:
-            message = f"Error saving dictionary: {e}"
+            message = f"Error compacting dictionary: {e}"
             print(message)
             return False, message
-    
+        finally:
+            self._compaction_lock.release()
+
     def add_word(self, english, hindi):
-        """Add a new word to the dictionary for the current session"""
-        self.eng_to_hindi_dict[english.lower()] = hindi
-        
+        """Add a new word to the dictionary for the current session.
+        Publishes a new dictionary version; translations already running keep the version they started with."""
+        english = english.lower()
+        with self._write_lock:
+            current = self._snapshot
+            staged = current.replace(words=with_changes(current.words, {english: hindi}),
+                                     phrase_trie=current.phrase_trie)
+            if current.size is not None: # Count the new word without recounting the whole dictionary
+                known = english in current.words or (current.compact_dict is not None
+                                                     and english in current.compact_dict)
+                staged.size = current.size + (not known)
+            changed_words = {english}
+            # Otherwise it is not known which cached words this edit affects, and every cached translation is dropped
+            targeted = isinstance(staged.words, LayeredDict)
+            if " " in english:
+                if current.phrase_trie is not None: # Otherwise built with this phrase on first use
+                    staged.phrase_trie = self._add_phrase(current.phrase_trie, english)
+                changed_words.update(fast_tokenize(english)) # Sentences containing the phrase translate differently
+            else:
+                if current.inflection_index_ready:
+                    index_changes = self._index_headwords(staged, [english])
+                    staged.inflection_index = with_changes(current.inflection_index, index_changes)
+                    changed_words.update(index_changes)
+                    targeted = targeted and isinstance(staged.inflection_index, LayeredDict)
+                else:
+                    targeted = False # Inflected forms are lemmatized per word; any of them could resolve to this one
+                if current.suggestion_index is not None:
+                    staged.suggestion_index = current.suggestion_index.with_words([english])
+                    targeted = False # Any unknown word may now be corrected to this one
+            if targeted:
+                staged.epoch = current.epoch
+                staged.changed = dict(current.changed)
+                staged.changed.update(dict.fromkeys(changed_words, staged.version))
+            self._publish(staged)
+        with self._journal_lock:
+            self._pending_edits[english] = hindi
+
+    def _build_inflection_index(self, staged):
+        """Index the inflected forms of every headword so translate() needs no lemmatizer calls"""
+        try:
+            if self._morphology is None:
+                self._morphology = load_wordnet_morphology()
+            index = dict(staged.inflection_index)
+            for form, translation in self._index_headwords(staged, list(staged.words)).items():
+                if translation is None:
+                    index.pop(form, None)
+                else:
+                    index[form] = translation
+            staged.inflection_index = index
+            staged.inflection_index_ready = True
+            print(f"Inflection index built with {len(staged.inflection_index)} inflected forms.")
+        except LookupError:
+            print("NLTK 'wordnet' data not found. Inflection index disabled; falling back to per-word lemmatization.")
+            staged.inflection_index_ready = False
+        except Exception as e:
+            print(f"Error building inflection index: {e}. Falling back to per-word lemmatization.")
+            staged.inflection_index_ready = False
+
+    def _build_suggestion_index(self, staged):
+        """Build the typo-suggestion index for `staged` (caller holds _write_lock)"""
+        staged.suggestion_index = self._new_suggestion_index(staged)
+
+    def _new_suggestion_index(self, snapshot):
+        """Typo-suggestion index over the single-word headwords of a snapshot's overlay and compact dictionaries"""
+        headwords = itertools.chain(snapshot.words, snapshot.compact_dict if snapshot.compact_dict is not None else ())
+        index = DeletionIndex(headwords, self.suggestion_distance)
+        report = index.memory_report()
+        print(f"Suggestion index built over {report['words']} words ({report['total_bytes'] / 2**20:.1f} MB) "
+              f"in {report['build_seconds']:.2f}s.")
+        return index
+
+    def _add_phrase(self, trie, phrase):
+        """Return a copy of `trie` with one multi-word entry inserted, tokenized the way translate() tokenizes.
+        Only the nodes on the phrase's path are copied; `trie` itself may be in use by readers and is left as is."""
+        tokens = fast_tokenize(phrase)
+        if len(tokens) < 2:
+            return trie
+        root = node = dict(trie)
+        for token in tokens:
+            child = dict(node.get(token, {}))
+            node[token] = child
+            node = child
+        node[None] = phrase
+        return root
+
+    def _longest_phrase(self, phrase_trie, english_words, start):
+        """Greedy longest match in `phrase_trie` at `start`; returns (end index, phrase key) or None"""
+        node = phrase_trie
+        best = None
+        i = start
+        while i < len(english_words):
+            node = node.get(english_words[i])
+            if node is None:
+                break
+            i += 1
+            phrase = node.get(None)
+            if phrase is not None:
+                best = (i, phrase)
+        return best
+
+    def _index_headwords(self, staged, headwords):
+        """Find the inflected forms of `headwords` and re-resolve every form they can affect against `staged`.
+        Returns {form: Hindi entry, or None if it no longer resolves} for the forms whose index entry changes."""
+        touched = set()
+        for headword in headwords:
+            if headword in self._indexed_headwords or " " in headword: # Phrases are handled by the phrase trie
+                continue
+            self._indexed_headwords.add(headword)
+            for form in inflection_candidates(headword, self._morphology):
+                if form in self._form_lemmas:
+                    continue
+                lemmas = lemma_candidates(form)
+                if not lemmas:
+                    continue
+                self._form_lemmas[form] = lemmas
+                for lemma in lemmas:
+                    self._forms_by_lemma.setdefault(lemma, set()).add(form)
+                touched.add(form)
+        for headword in headwords:
+            touched.update(self._forms_by_lemma.get(headword, ()))
+        index = staged.inflection_index
+        changes = {}
+        for form in touched:
+            translation = self._resolve_form(staged, form)
+            if translation != index.get(form):
+                changes[form] = translation
+        return changes
+
+    def _resolve_form(self, staged, form):
+        """Hindi entry of the highest-priority lemma of `form` that is in the staged dictionary, or None"""
+        for lemma in self._form_lemmas[form]:
+            translation = staged.lookup(lemma)
+            if translation:
+                return translation
+        return None
+
+    def _lemma_fallback(self, current, clean_word):
+        """Lemmatize `clean_word` on the fly (used only when the inflection index is unavailable).
+        Returns (translation, WordNet POS of the lemma that matched), or (None, None)."""
+        try:
+            for pos in LEMMA_POS_ORDER:
+                lemma = lemmatizer.lemmatize(clean_word, pos=pos)
+                if lemma != clean_word:
+                    translation = current.lookup(lemma)
+                    if translation:
+                        return translation, pos
+        except LookupError: # Specifically for missing 'wordnet'
+            print("NLTK 'wordnet' lemmatizer data not found. Cannot lemmatize. Please ensure it's downloaded.")
+        except Exception as e:
+            print(f"Error lemmatizing word '{clean_word}': {e}")
+        return None, None
+
     def translate(self, english_sentence):
         """Translate an English sentence to Hindi"""
-        # Ensure NLTK data (punkt for tokenization) is available
+        if "first_translation" in self.timings:
+            return self._translate_sentence(english_sentence, self._snapshot)
+        start = time.perf_counter()
+        translation = self._translate_sentence(english_sentence, self._snapshot)
+        self.timings.setdefault("first_translation", time.perf_counter() - start)
+        return translation
+
+    def _translate_sentence(self, english_sentence, current):
+        """Translate one sentence against the dictionary snapshot `current`"""
+        return self._translate_sentence_tokens(english_sentence, current)[0]
+
+    def _translate_sentence_tokens(self, english_sentence, current):
+        """Translate one sentence against the dictionary snapshot `current`; returns (translation, its tokens)"""
+        stats = self._stats
+        if stats is not None:
+            start = time.perf_counter()
+        if self.fast_tokenizer:
+            english_words = fast_tokenize(english_sentence.lower())
+        else:
+            english_words = self._nltk_tokenize(english_sentence)
+
+        hindi_translation_words = []
+        if stats is None:
+            self._translate_words(english_words, hindi_translation_words, current)
+        else:
+            self._translate_words_instrumented(english_words, hindi_translation_words, current, stats,
+                                               time.perf_counter() - start)
+        return " ".join(hindi_translation_words), english_words
+
+    def translate_document(self, english_text, session_id=None):
+        """Translate a multi-sentence text, reusing cached translations of sentences that have not changed.
+
+        Sentences are cached by their text, so after editing the text only the edited sentences are
+        retranslated, and after add_word() only the sentences containing the changed words. Passing a
+        `session_id` (e.g. one per browser session) lets the cache drop a session's old sentences as soon
+        as it stops showing them. The result matches translate() except that multi-word phrases are not
+        matched across sentence boundaries."""
+        start = time.perf_counter()
+        current = self._snapshot
+        cache = self.sentence_cache
+        sentences = split_sentences(english_text)
+        pieces = []
+        for sentence in sentences:
+            translation = cache.get(current, sentence)
+            if translation is None:
+                translation, english_words = self._translate_sentence_tokens(sentence, current)
+                cache.put(current, sentence, translation, english_words)
+            pieces.append(translation)
+        if session_id is not None:
+            cache.track(session_id, sentences)
+        self.timings.setdefault("first_translation", time.perf_counter() - start)
+        return " ".join(pieces)
+
+    def translate_batch(self, english_sentences):
+        """Translate an iterable of sentences, returning a list of Hindi translations"""
+        return list(self._iter_translations(english_sentences))
+
+    def translate_stream(self, file_obj):
+        """Lazily translate a text stream line by line, yielding one translation per input line"""
+        return self._iter_translations(line.rstrip("\r\n") for line in file_obj)
+
+    def translate_parallel(self, english_sentences, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=None):
+        """Translate sentences in worker processes, yielding translations in input order.
+
+        When fork is available and this is the only running thread, the workers inherit this translator
+        copy-on-write; otherwise (e.g. under Streamlit or a server, where another thread could be holding
+        a cache or lemmatizer lock at the moment of the fork) they are spawned and each rebuilds it once
+        from snapshot(). At most `max_in_flight` chunks (default 2 per worker) are queued at a time,
+        so memory stays bounded however long the input is."""
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = max_in_flight or 2 * workers
+        if ("fork" in multiprocessing.get_all_start_methods() and sys.platform != "darwin"
+                and threading.active_count() == 1):
+            context = multiprocessing.get_context("fork")
+            source = self # Handed to the forked workers as is, not pickled
+            self._snapshot.phrases() # Built once here rather than in every worker
+        else:
+            context = multiprocessing.get_context("spawn")
+            source = self.snapshot()
+        with context.Pool(workers, initializer=init_worker, initargs=(source,)) as pool:
+            sentences = iter(english_sentences)
+            pending = deque()
+            while True:
+                while len(pending) < max_in_flight:
+                    chunk = list(itertools.islice(sentences, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(pool.apply_async(translate_in_worker, (chunk,)))
+                if not pending:
+                    break
+                yield from pending.popleft().get()
+
+    def _iter_translations(self, english_sentences, tokenize=None):
+        """Shared loop for batch/stream translation; setup and warnings happen once, not per sentence"""
+        tokenize = tokenize or self._batch_tokenizer()
+        translate_words = self._translate_words
+        stats = self._stats
+        pieces = [] # Reused for every sentence
+        for english_sentence in english_sentences:
+            pieces.clear()
+            if stats is not None:
+                start = time.perf_counter()
+            try:
+                english_words = tokenize(english_sentence.lower())
+            except Exception as e:
+                print(f"Word tokenization failed: {e}. Falling back to simple split.")
+                english_words = english_sentence.lower().split()
+            if stats is None:
+                translate_words(english_words, pieces)
+            else:
+                self._translate_words_instrumented(english_words, pieces, None, stats, time.perf_counter() - start)
+            yield " ".join(pieces)
+
+    def _translate_words(self, english_words, pieces, current=None, outcomes=None, oov_words=None):
+        """Append the translation of each token (or matched multi-word phrase) in `english_words` to `pieces`.
+        Phrases are matched greedily, longest first, in one left-to-right pass. The whole sentence is
+        translated against one dictionary snapshot (by default the current one, taken without locking).
+        If an `outcomes` dict is given, each lookup outcome is counted in it and OOV words go to `oov_words`."""
+        if current is None:
+            current = self._snapshot
+        epoch = current.epoch
+        changed = current.changed
+        cache_get = self.token_cache.get
+        cache_put = self.token_cache.put
+        phrase_trie = current.phrases()
+        i = 0
+        while i < len(english_words):
+            word = english_words[i]
+            if phrase_trie and word in phrase_trie:
+                match = self._longest_phrase(phrase_trie, english_words, i)
+                if match is not None:
+                    i, phrase = match
+                    translation = current.lookup(phrase)
+                    pieces.append(translation or f"[{phrase}]")
+                    if outcomes is not None:
+                        outcome = "phrase" if translation else "oov"
+                        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                        if not translation:
+                            oov_words.append(phrase)
+                    continue
+            key = (epoch, word)
+            if changed:
+                stamp = changed.get(word.strip(PUNCTUATION_CHARS))
+                if stamp is not None: # Changed since the epoch began: entries made before that must not match
+                    key = (epoch, word, stamp)
+            entry = cache_get(key)
+            if entry is None:
+                entry = self._translate_token_outcome(current, word)
+                cache_put(key, entry)
+            pieces.append(entry[0])
+            if outcomes is not None:
+                outcome = entry[1]
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                if outcome == "oov":
+                    oov_words.append(entry[2])
+            i += 1
+
+    def _translate_words_instrumented(self, english_words, pieces, current, stats, tokenize_seconds):
+        """_translate_words() that also records the sentence's timings and each token's lookup outcome in `stats`"""
+        start = time.perf_counter()
+        outcomes = {}
+        oov_words = []
+        self._translate_words(english_words, pieces, current, outcomes, oov_words)
+        stats.record(len(english_words), tokenize_seconds, time.perf_counter() - start, outcomes, oov_words)
+
+    def _batch_tokenizer(self):
+        """Pick the tokenizer for batches, checking NLTK readiness (and warning) only for the first one"""
+        if self.fast_tokenizer:
+            return fast_tokenize
+        tokenize = self._batch_tokenize
+        if tokenize is not None:
+            return tokenize
+        if not NLTK_DATA_DOWNLOADED:
+            print("Warning: NLTK data might not be fully downloaded. Attempting translation...")
+        try:
+            word_tokenize("probe.")
+            tokenize = word_tokenize
+        except LookupError: # Specifically for missing 'punkt_tab'
+            print("NLTK 'punkt_tab' tokenizer not found. Please ensure it's downloaded. Falling back to simple split.")
+            tokenize = str.split
+        self._batch_tokenize = tokenize
+        return tokenize
+
+    def _nltk_tokenize(self, english_sentence):
+        """Tokenize with NLTK's word_tokenize, falling back to a whitespace split"""
+        # Ensure NLTK data (punkt_tab for tokenization) is available
         if not NLTK_DATA_DOWNLOADED:
             # This is a fallback, ideally app.py ensures this before calling translate
             print("Warning: NLTK data might not be fully downloaded. Attempting translation...")
@@ -174,86 +1474,142 @@ class EnglishHindiTranslator:
         
         try:
             english_words = word_tokenize(english_sentence.lower())
-        except LookupError: # Specifically for missing 'punkt'
-            print("NLTK 'punkt' tokenizer not found. Please ensure it's downloaded. Falling back to simple split.")
+        except LookupError: # Specifically for missing 'punkt_tab'
+            print("NLTK 'punkt_tab' tokenizer not found. Please ensure it's downloaded. Falling back to simple split.")
             english_words = english_sentence.lower().split()
         except Exception as e: # Other tokenization errors
             print(f"Word tokenization failed: {e}. Falling back to simple split.")
             english_words = english_sentence.lower().split()
-            
-        hindi_translation_words = []
-
-        for word in english_words:
-            # Remove punctuation if it's attached to the word
-            clean_word = word.strip('.,!?;:"\'()[]{}') # Added more punctuation
-            punct = ""
-            if len(word) > len(clean_word):
-                # Heuristic to get trailing punctuation
-                # This is simple; a more robust solution might use regex
-                for i in range(len(word) -1, -1, -1):
-                    if word[i].isalnum():
-                        break
-                    punct = word[i] + punct
-                if not punct and clean_word != word : # handle leading punctuation if any
-                     # find first alphanumeric char to split
-                    first_alnum_idx = -1
-                    for idx_c, char_c in enumerate(word):
-                        if char_c.isalnum():
-                            first_alnum_idx = idx_c
-                            break
-                    if first_alnum_idx > 0: # leading punct
-                        punct = word[:first_alnum_idx] # this would be leading, not ideal for append
-                        # For simplicity, we'll stick to trailing punctuation logic primarily
-                        # or just ensure clean_word is really clean.
-                        # Resetting punct if it seems to be leading, as we append it.
-                        # A better approach: split word into (leading_punct, core, trailing_punct)
-                        punct = word[len(clean_word):] # Revert to simpler trailing punct
+        return english_words
 
-            
-            # Try direct lookup first
-            translation = self.eng_to_hindi_dict.get(clean_word)
+    def _translate_token_outcome(self, current, word):
+        """Translate a single token; returns (rendered translation, lookup outcome, cleaned word)"""
+        # Remove punctuation if it's attached to the word
+        clean_word = word.strip(PUNCTUATION_CHARS)
+        punct = ""
+        if len(word) > len(clean_word):
+            leading, core, trailing = _TOKEN_PARTS_RE.match(word).groups()
+            if trailing or not core:
+                punct = trailing or leading # A token made only of punctuation keeps all of it
+            elif leading:
+                # Only leading punctuation: keep whatever follows the cleaned length (historical behaviour)
+                punct = word[len(clean_word):]
 
-            if translation:
-                hindi_translation_words.append(translation + punct)
-            else:
-                # If direct lookup fails, try lemmatized form
-                try:
-                    lemma_v = lemmatizer.lemmatize(clean_word, pos='v')  # Try as verb
-                    lemma_n = lemmatizer.lemmatize(clean_word, pos='n')  # Try as noun
-                    lemma_adj = lemmatizer.lemmatize(clean_word, pos='a') # Try as adjective
-                    lemma_adv = lemmatizer.lemmatize(clean_word, pos='r') # Try as adverb
-                    
-                    # Check in order of likelihood or preference
-                    translation_lemma = self.eng_to_hindi_dict.get(lemma_v)
-                    if not translation_lemma:
-                        translation_lemma = self.eng_to_hindi_dict.get(lemma_n)
-                    if not translation_lemma and lemma_n != clean_word : # if lemmatizing as noun changed it, try that first
-                         translation_lemma = self.eng_to_hindi_dict.get(lemmatizer.lemmatize(clean_word)) # default pos=NOUN
-
-                    if not translation_lemma: # Generic lemmatize (often noun)
-                        lemma_generic = lemmatizer.lemmatize(clean_word)
-                        if lemma_generic != clean_word: # only lookup if lemmatization changed the word
-                            translation_lemma = self.eng_to_hindi_dict.get(lemma_generic)
-
-                    # Fallback to checking other POS if still not found
-                    if not translation_lemma and lemma_v != clean_word:
-                        translation_lemma = self.eng_to_hindi_dict.get(lemma_v)
-                    if not translation_lemma and lemma_adj != clean_word:
-                        translation_lemma = self.eng_to_hindi_dict.get(lemma_adj)
-                    if not translation_lemma and lemma_adv != clean_word:
-                        translation_lemma = self.eng_to_hindi_dict.get(lemma_adv)
-
-
-                    if translation_lemma:
-                        hindi_translation_words.append(translation_lemma + punct)
+        # Try direct lookup first, then the precomputed inflection indexes
+        outcome = "direct"
+        translation = current.lookup(clean_word)
+        if not translation:
+            outcome = "inflection"
+            if current.inflection_index_ready:
+                translation = current.inflection_index.get(clean_word)
+                if not translation and current.compact_dict is not None:
+                    if current.compact_dict.has_inflections:
+                        translation = current.compact_dict.get_inflection(clean_word)
                     else:
-                        # If word is not found in the dictionary even after lemmatization
-                        hindi_translation_words.append(f"[{clean_word}]{punct}")
-                except LookupError: # Specifically for missing 'wordnet'
-                    print("NLTK 'wordnet' lemmatizer data not found. Cannot lemmatize. Please ensure it's downloaded.")
-                    hindi_translation_words.append(f"[{clean_word}]{punct}") # Fallback for missing WordNet
-                except Exception as e:
-                    print(f"Error lemmatizing word '{clean_word}': {e}")
-                    hindi_translation_words.append(f"[{clean_word}]{punct}")
-
-        return " ".join(hindi_translation_words)
+                        translation, pos = self._lemma_fallback(current, clean_word)
+                        outcome = f"lemma_{pos}"
+            else:
+                translation, pos = self._lemma_fallback(current, clean_word)
+                outcome = f"lemma_{pos}"
+        if not translation and current.suggestion_index is not None:
+            # Most likely a typo: translate the nearest headword instead
+            suggestion = current.suggestion_index.suggest(clean_word)
+            if suggestion is not None:
+                translation = current.lookup(suggestion)
+                outcome = "suggestion"
+
+        if translation:
+            return translation + punct, outcome, clean_word
+        else:
+            # If word is not found in the dictionary even after lemmatization
+            return f"[{clean_word}]{punct}", ("oov" if clean_word else "punctuation"), clean_word
+
+
+# State of a worker process (translate_parallel() and translation_server --processes); set only by init_worker()
+_worker_translator = None
+_worker_tokenize = None
+
+
+def init_worker(source):
+    """Process pool initializer. `source` is translator.snapshot(), from which the worker rebuilds the translator,
+    or (with the fork start method only) the translator itself, which the forked worker already holds a copy of"""
+    global _worker_translator, _worker_tokenize
+    sys.stdout = sys.stderr # Workers only return results; keep their messages off the output stream
+    if isinstance(source, EnglishHindiTranslator):
+        _worker_translator = source
+    else:
+        _worker_translator = EnglishHindiTranslator.from_snapshot(source)
+    _worker_tokenize = _worker_translator._batch_tokenizer()
+
+
+def translate_in_worker(english_sentences):
+    """Translate a list of sentences inside a process set up by init_worker(); returns a list of translations"""
+    return list(_worker_translator._iter_translations(english_sentences, _worker_tokenize))
+
+
+def main(argv=None):
+    """Command line entry point: translate files (or stdin) line by line to stdout"""
+    parser = argparse.ArgumentParser(
+        prog="python -m translator_backend",
+        description="Translate English text to Hindi, one line at a time.")
+    parser.add_argument("files", nargs="*", help="Input files (default: read from stdin)")
+    parser.add_argument("--fast-tokenizer", action="store_true",
+                        help="Use the regex tokenizer instead of NLTK's word_tokenize")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_TOKEN_CACHE_SIZE,
+                        help="Maximum number of cached token translations (0 disables the cache)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (default: 1, translate in this process; 0: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Lines sent to a worker process at a time")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never download NLTK data; only check what is installed locally")
+    parser.add_argument("--stats", action="store_true",
+                        help="Collect per-stage timings and lookup outcomes and print them at the end")
+    parser.add_argument("--suggest", action="store_true",
+                        help="Translate misspelled words through the nearest dictionary word (up to 2 edits away)")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    for stream in (sys.stdin, out):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(encoding="utf-8")
+
+    # Backend messages go to stderr so stdout carries only translations
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.offline:
+            missing = [resource for resource, found in check_nltk_data().items() if not found]
+            if missing:
+                print(f"NLTK data not installed: {', '.join(missing)} (offline mode, not downloading).")
+        elif not args.fast_tokenizer:
+            download_nltk_data_once()
+        translator = EnglishHindiTranslator(cache_size=args.cache_size, fast_tokenizer=args.fast_tokenizer,
+                                            collect_stats=args.stats, suggestions=args.suggest)
+        print(f"Translator ready in {translator.timings['init']:.2f}s.")
+
+        line_count = 0
+        start = time.perf_counter()
+        for path in args.files or ["-"]:
+            with (contextlib.nullcontext(sys.stdin) if path == "-" else open(path, "r", encoding="utf-8")) as f:
+                if args.workers == 1:
+                    translations = translator.translate_stream(f)
+                else:
+                    translations = translator.translate_parallel((line.rstrip("\r\n") for line in f),
+                                                                 workers=args.workers or None,
+                                                                 chunk_size=args.chunk_size)
+                for translation in translations:
+                    out.write(translation)
+                    out.write("\n")
+                    line_count += 1
+        out.flush()
+        elapsed = time.perf_counter() - start
+        rate = line_count / elapsed if elapsed > 0 else 0.0
+        print(f"Translated {line_count} lines in {elapsed:.2f}s ({rate:.0f} lines/sec).")
+        if args.workers == 1:
+            print(f"Token cache: {translator.token_cache.info()}")
+            if args.stats:
+                print(f"Translation stats: {translator.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())